@@ -1,6 +1,7 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
+
+# Only Streamlit is imported here: pandas, Plotly and the data load with the first analysis page
+from utils.images import image
 
 # Set the title
 st.title('YouTube Data Analysis')
@@ -19,8 +20,8 @@ st.markdown(
     """
 )
 
-# Add an image
-st.image("images/youtube_home_page.jpg", caption='YouTube Data Analysis')
+# Add an image (pre-sized and cached, see utils.images)
+st.image(image("images/youtube_home_page.jpg"), caption='YouTube Data Analysis')
 
 # Detailed description of each page
 st.markdown(
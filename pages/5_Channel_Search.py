@@ -0,0 +1,43 @@
+import streamlit as st
+
+from utils import profiling
+from utils.backends import get_backend
+
+# Record per-stage timings when profiling is requested (TUBEMETRICS_PROFILE=1 or ?profile=1); the
+# performance panel is shown at the end of the rerun
+with profiling.run('channel_search'):
+    # Query backend over the shared dataset (pandas by default, see utils.backends)
+    backend = get_backend()
+
+    # Main title and description
+    st.markdown("# Channel Search")
+    st.write(
+        """Looking for a particular YouTuber? Search by name (the start of any word, or a close spelling) and open the channel's profile to see how it ranks on subscribers, video views, video count and views per video, against every channel, within its category and among channels that started the same year."""
+    )
+
+    # Search box backed by the prebuilt name index
+    query = st.text_input("Search YouTubers", placeholder="Start typing a channel name").strip()
+
+    if query:
+        matches = backend.search(query, limit=10)
+        if matches.empty:
+            st.info("No matching YouTubers found.")
+        else:
+            # Pick one of the matches to drill down into
+            options = {f"{row.Youtuber} (#{row.Rank})": row.Rank for row in matches[['Rank', 'Youtuber']].itertuples()}
+            selected = st.selectbox("Matching YouTubers", list(options))
+            channel, profile = backend.channel_profile(options[selected])
+
+            st.write(f"## {channel['Youtuber']}")
+            st.write(f"**Category:** {channel['Category']} | **Started:** {channel['Started']} | **Rank:** {channel['Rank']}")
+
+            # Headline numbers
+            subscribers_col, views_col, videos_col = st.columns(3)
+            subscribers_col.metric("Subscribers", f"{channel['Subscribers']:,}")
+            views_col.metric("Video Views", f"{channel['Video Views']:,}")
+            videos_col.metric("Video Count", f"{channel['Video Count']:,}")
+
+            # Rank and percentile on every metric, overall, within the category and within the start-year cohort
+            st.write("## Rank and Percentile")
+            st.dataframe(profile, hide_index=True, use_container_width=True)
+            st.caption("Percentile: share of channels in the group ranked at or below this one. Cohort: channels that started the same year.")
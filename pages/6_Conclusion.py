@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 
 # Assuming you have the necessary data loaded or imported
 
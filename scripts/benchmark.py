@@ -0,0 +1,234 @@
+"""Benchmark every page headlessly over its sidebar selections and tabs.
+
+Usage:
+    python -m scripts.benchmark [--rows N ...] [--data PATH ...] [--output results.json]
+                                [--baseline baseline.json] [--threshold 0.25]
+                                [--memory-threshold 0.25] [--figure-threshold 0.1]
+
+Each case (dataset, page, widget, value) is rerun cold (caches cleared) and
+then warm, recording rerun latency, peak traced memory and the size of the
+figure specs sent to the browser. Cases cover every sidebar option, every
+tab and the controls inside it, and sample queries in text inputs. With
+--baseline, the run fails if any warm or cold latency exceeds the
+baseline's by more than --threshold, peak memory by more than
+--memory-threshold, or figure size by more than --figure-threshold.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from scripts.generate_dataset import generate
+from utils.data import DATA_PATH, ROOT_DIR
+
+# Pages in navigation order
+PAGES = [
+    'Tubemetrics.py',
+    'pages/1_Categorical_Analysis.py',
+    'pages/2_Yearly_Analysis.py',
+    'pages/3_Views_per_Video_Analysis.py',
+    'pages/4_Comparative_Analysis.py',
+    'pages/5_Channel_Search.py',
+    'pages/6_Conclusion.py',
+]
+
+# Session state keys of the lazy tabs on each page
+TAB_KEYS = {
+    'pages/1_Categorical_Analysis.py': 'categorical_tab',
+    'pages/3_Views_per_Video_Analysis.py': 'views_per_video_tab',
+    'pages/4_Comparative_Analysis.py': 'comparative_tab',
+}
+
+# Queries typed into each page's text inputs: a word prefix and a misspelling
+TEXT_QUERIES = {
+    'pages/5_Channel_Search.py': ['music', 'pewdipie'],
+}
+
+
+def synthetic_csv(rows, directory):
+    """Generate a synthetic CSV of 'rows' channels (see scripts.generate_dataset)."""
+    return generate(os.path.join(directory, f'synthetic_{rows}.csv'), rows)
+
+
+def clear_caches():
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def figure_bytes(app):
+    return sum(len(element.proto.spec) for element in app.get('plotly_chart'))
+
+
+def select_tab(app, page, tab):
+    # AppTest does not report the selected tab back to the page, so it is set again before every rerun
+    if tab is not None:
+        app.session_state[TAB_KEYS[page]] = tab
+
+
+def timed_run(app, page, tab=None):
+    """Rerun the page (on 'tab', if given), returning (latency ms, peak traced memory KB)."""
+    select_tab(app, page, tab)
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    app.run()
+    latency = (time.perf_counter() - start) * 1000
+    if app.exception:
+        raise RuntimeError(f"{app.exception[0].message}")
+    return latency, tracemalloc.get_traced_memory()[1] / 1024
+
+
+def widgets(app):
+    """(kind, label) of every input widget the page rendered."""
+    return {(kind, element.label) for kind in ('selectbox', 'multiselect', 'radio', 'select_slider', 'text_input')
+            for element in app.get(kind)}
+
+
+def widget_selections(app, page, skip=()):
+    """Yield (widget, value, apply) for the options of each input widget of a rendered page, except 'skip'."""
+    for index, box in enumerate(app.selectbox):
+        if ('selectbox', box.label) not in skip:
+            for option_index, option in enumerate(box.options):
+                yield box.label, option, lambda app, i=index, j=option_index: app.selectbox[i].select_index(j)
+    for index, box in enumerate(app.multiselect):
+        if ('multiselect', box.label) not in skip:
+            for option in box.options:
+                yield box.label, option, lambda app, i=index, value=option: app.multiselect[i].set_value([value])
+    for index, radio in enumerate(app.radio):
+        if ('radio', radio.label) not in skip:
+            for option in radio.options:
+                yield radio.label, option, lambda app, i=index, value=option: app.radio[i].set_value(value)
+    for index, slider in enumerate(app.select_slider):
+        if ('select_slider', slider.label) not in skip:
+            # The full range and its last option alone
+            for lower, upper in [(slider.options[0], slider.options[-1]), (slider.options[-1], slider.options[-1])]:
+                yield (slider.label, f'{lower}-{upper}',
+                       lambda app, i=index, lower=lower, upper=upper: app.select_slider[i].set_range(lower, upper))
+    for index, box in enumerate(app.text_input):
+        if ('text_input', box.label) not in skip:
+            for query in TEXT_QUERIES.get(page, []):
+                yield box.label, query, lambda app, i=index, value=query: app.text_input[i].input(value)
+
+
+def selections(app, page, open_tab):
+    """Yield (widget, value, tab, apply) for every option, tab and tab control of a page.
+
+    'apply' makes the change on a session showing 'tab' (None: the default
+    one); selecting a tab itself has no 'apply'. 'open_tab' renders a new
+    session on a tab, to find the controls only that tab shows.
+    """
+    for widget, value, apply in widget_selections(app, page):
+        yield widget, value, None, apply
+    if page in TAB_KEYS:
+        for tab in app.tabs:
+            yield 'tab', tab.label, tab.label, None
+            for widget, value, apply in widget_selections(open_tab(tab.label), page, skip=widgets(app)):
+                yield widget, value, tab.label, apply
+
+
+def benchmark_page(page, dataset, timeout):
+    path = str(ROOT_DIR / page)
+    results = []
+
+    def open_tab(tab):
+        app = AppTest.from_file(path, default_timeout=timeout)
+        timed_run(app, page, tab)
+        return app
+
+    clear_caches()
+    app = AppTest.from_file(path, default_timeout=timeout)
+    cold, peak = timed_run(app, page)
+    warm, _ = timed_run(app, page)
+    results.append({'dataset': dataset, 'page': page, 'widget': None, 'value': None,
+                    'cold_ms': cold, 'warm_ms': warm, 'peak_kb': peak, 'figure_bytes': figure_bytes(app)})
+
+    for widget, value, tab, apply in list(selections(app, page, open_tab)):
+        # Cold: fresh caches and session with only this selection applied, on its tab
+        clear_caches()
+        app = open_tab(tab if apply else None)
+        clear_caches()
+        if apply:
+            apply(app)
+        cold, peak = timed_run(app, page, tab)
+        warm, _ = timed_run(app, page, tab)
+        results.append({'dataset': dataset, 'page': page, 'widget': widget, 'value': value,
+                        'cold_ms': cold, 'warm_ms': warm, 'peak_kb': peak, 'figure_bytes': figure_bytes(app)})
+    return results
+
+
+def compare(results, baseline, thresholds):
+    """Return a message per case and field exceeding its baseline by more than its threshold.
+
+    'thresholds' maps result fields ('cold_ms', 'warm_ms', 'peak_kb',
+    'figure_bytes') to the relative increase allowed.
+    """
+    def key(case):
+        return case['dataset'], case['page'], case['widget'], str(case['value'])
+
+    reference = {key(case): case for case in baseline}
+    failures = []
+    for case in results:
+        base = reference.get(key(case))
+        if base is None:
+            continue
+        for field, threshold in thresholds.items():
+            if case[field] > base[field] * (1 + threshold):
+                failures.append(f"{case['page']} {case['widget']}={case['value']} [{case['dataset']}]: "
+                                f"{field} {case[field]:.1f} > {base[field]:.1f} (+{threshold:.0%})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', action='append', default=[], help='extra dataset path (repeatable)')
+    parser.add_argument('--rows', type=int, action='append', default=[], help='add a synthetic dataset of N rows (repeatable)')
+    parser.add_argument('--pages', nargs='*', default=PAGES, help='pages to run (default: all)')
+    parser.add_argument('--output', default='bench_results.json', help='results file')
+    parser.add_argument('--baseline', help='results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown over the baseline (default: 0.25)')
+    parser.add_argument('--memory-threshold', type=float, default=0.25,
+                        help='allowed peak memory increase over the baseline (default: 0.25)')
+    parser.add_argument('--figure-threshold', type=float, default=0.1,
+                        help='allowed figure size increase over the baseline (default: 0.1)')
+    parser.add_argument('--timeout', type=float, default=120, help='seconds allowed per rerun')
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT_DIR)
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory() as directory:
+        datasets = [str(DATA_PATH)] + args.data + [synthetic_csv(rows, directory) for rows in args.rows]
+        results = []
+        for dataset in datasets:
+            os.environ['TUBEMETRICS_DATA'] = dataset
+            name = os.path.basename(dataset)
+            for page in args.pages:
+                start = time.perf_counter()
+                cases = benchmark_page(page, name, args.timeout)
+                results += cases
+                print(f"{name:32} {page:40} {len(cases):4} cases "
+                      f"warm p50 {np.median([case['warm_ms'] for case in cases]):8.1f} ms "
+                      f"({time.perf_counter() - start:.1f}s)")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    print(f"Wrote {len(results)} cases to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            thresholds = {'cold_ms': args.threshold, 'warm_ms': args.threshold,
+                          'peak_kb': args.memory_threshold, 'figure_bytes': args.figure_threshold}
+            failures = compare(results, json.load(f), thresholds)
+        for failure in failures:
+            print('REGRESSION', failure)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
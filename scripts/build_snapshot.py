@@ -0,0 +1,23 @@
+"""Convert the dataset CSV into its typed Arrow snapshot.
+
+Usage:
+    python -m scripts.build_snapshot [CSV_PATH]
+"""
+import argparse
+import time
+
+from utils.data import DATA_PATH, build_snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv_path', nargs='?', default=str(DATA_PATH), help='CSV file to convert')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    path = build_snapshot(args.csv_path)
+    print(f"Wrote {path} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Generate a synthetic channel table shaped like the bundled dataset, at any size.
+
+Usage:
+    python -m scripts.generate_dataset ROWS OUTPUT [--chunk-rows N] [--workers N] [--seed N]
+
+OUTPUT ending in .csv, .parquet or .arrow picks the format. Distributions are
+fitted to the bundled CSV:
+
+- Subscribers follow the power law of the real ranking (subscribers ~ rank^-b),
+  rounded to 3 significant figures like YouTube's public counts, so Rank is
+  simply the row number.
+- Views per subscriber and video count are log-normal and correlated as in
+  the real file, with the same share of zero-video aggregator channels
+  (like 'YouTube Movies'), which have no views either.
+- Category (including missing) and Started follow the real mix.
+
+Chunks are generated in parallel and written in order, with at most two
+chunks per worker in memory, so the output can be far larger than RAM. The
+same seed and chunk size give the same file for any number of workers.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.data import DATA_PATH, read_csv
+
+COLUMNS = ['Rank', 'Youtuber', 'Subscribers', 'Video Views', 'Video Count', 'Category', 'Started']
+
+
+def fit(data):
+    """Fit the generator's parameters to a channel table."""
+    rank = np.arange(1, len(data) + 1)
+    slope, intercept = np.polyfit(np.log(rank), np.log(data['Subscribers'].to_numpy(dtype=float)), 1)
+
+    zero = data['Video Count'] == 0
+    active = data[~zero & (data['Video Views'] > 0)]
+    # log10 views per subscriber and log10 video count, jointly normal
+    logs = np.column_stack([np.log10(active['Video Views'] / active['Subscribers']),
+                            np.log10(active['Video Count'])])
+
+    def mix(values):
+        shares = values.value_counts(normalize=True, dropna=False)
+        return [None if pd.isna(value) else value for value in shares.index], shares.to_numpy()
+
+    return {
+        'subscribers': (intercept, slope),
+        'zero_share': zero.mean(),
+        'log_mean': logs.mean(axis=0),
+        'log_cov': np.cov(logs, rowvar=False),
+        'categories': mix(data.loc[~zero, 'Category']),
+        'zero_categories': mix(data.loc[zero, 'Category']) if zero.any() else mix(data['Category']),
+        'years': mix(data['Started']),
+        'names': data['Youtuber'].astype(str).tolist(),
+    }
+
+
+def round_significant(values, digits=3):
+    magnitude = 10 ** (np.floor(np.log10(np.maximum(values, 1))) - digits + 1)
+    return np.round(values / magnitude) * magnitude
+
+
+def generate_chunk(params, start, rows, seed):
+    """Channels ranked start+1 .. start+rows, as a DataFrame."""
+    rng = np.random.default_rng([seed, start])
+    rank = np.arange(start + 1, start + rows + 1)
+
+    # Deterministic in rank, so subscribers never increase across chunk boundaries
+    intercept, slope = params['subscribers']
+    subscribers = np.maximum(round_significant(np.exp(intercept + slope * np.log(rank))), 1).astype('int64')
+
+    ratio, video_count = rng.multivariate_normal(params['log_mean'], params['log_cov'], rows).T
+    video_count = np.maximum(np.round(10 ** video_count), 1).astype('int64')
+    video_views = np.round(subscribers * 10 ** ratio).astype('int64')
+
+    categories, shares = params['categories']
+    category = np.array(categories, dtype=object)[rng.choice(len(categories), rows, p=shares)]
+
+    zero = rng.random(rows) < params['zero_share']
+    video_count[zero] = 0
+    video_views[zero] = 0
+    zero_categories, zero_shares = params['zero_categories']
+    category[zero] = np.array(zero_categories, dtype=object)[rng.choice(len(zero_categories), zero.sum(), p=zero_shares)]
+
+    years, year_shares = params['years']
+    started = rng.choice(np.array(years, dtype='int64'), rows, p=year_shares)
+
+    # Real names with the rank appended, so names stay unique and searchable
+    names = np.array(params['names'], dtype=object)[rng.integers(0, len(params['names']), rows)]
+    youtuber = names + ' ' + rank.astype(str).astype(object)
+
+    return pd.DataFrame(dict(zip(COLUMNS, [rank, youtuber, subscribers, video_views, video_count, category, started])))
+
+
+def _encode(params, start, rows, seed, fmt):
+    # Runs in a worker: CSV chunks come back as text, columnar ones as Arrow tables
+    chunk = generate_chunk(params, start, rows, seed)
+    if fmt == 'csv':
+        return chunk.to_csv(index=False, header=start == 0)
+    import pyarrow as pa
+
+    return pa.Table.from_pandas(chunk, preserve_index=False)
+
+
+class _Writer:
+    """Appends encoded chunks to a CSV, Parquet or Arrow IPC file."""
+
+    def __init__(self, path, fmt):
+        self.path, self.fmt, self.writer = path, fmt, None
+        self.file = open(path, 'w', encoding='utf-8', newline='') if fmt == 'csv' else None
+
+    def write(self, chunk):
+        if self.fmt == 'csv':
+            self.file.write(chunk)
+            return
+        if self.writer is None:
+            if self.fmt == 'parquet':
+                import pyarrow.parquet as pq
+
+                self.writer = pq.ParquetWriter(self.path, chunk.schema)
+            else:
+                import pyarrow as pa
+
+                self.writer = pa.ipc.new_file(self.path, chunk.schema)
+        # One Parquet row group or Arrow record batch per chunk
+        self.writer.write_table(chunk)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def output_format(path):
+    fmt = os.path.splitext(str(path))[1].lstrip('.').lower()
+    if fmt not in ('csv', 'parquet', 'arrow'):
+        raise ValueError(f"unsupported output format {fmt!r}, expected .csv, .parquet or .arrow")
+    return fmt
+
+
+def generate(path, rows, chunk_rows=1_000_000, workers=None, seed=0, source=DATA_PATH):
+    """Write 'rows' synthetic channels to 'path', returning the path."""
+    fmt = output_format(path)
+    params = fit(read_csv(source))
+    starts = range(0, rows, chunk_rows)
+    workers = workers or os.cpu_count() or 1
+    writer = _Writer(path, fmt)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = []
+            for start in starts:
+                pending.append(executor.submit(_encode, params, start, min(chunk_rows, rows - start), seed, fmt))
+                # Bound memory: write the oldest chunk before queueing more than two per worker
+                if len(pending) >= 2 * workers:
+                    writer.write(pending.pop(0).result())
+            for future in pending:
+                writer.write(future.result())
+    finally:
+        writer.close()
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('rows', type=int, help='number of channels')
+    parser.add_argument('output', help='output file (.csv, .parquet or .arrow)')
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000, help='channels per chunk (default: 1,000,000)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--source', default=str(DATA_PATH), help='CSV to fit the distributions to')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    generate(args.output, args.rows, args.chunk_rows, args.workers, args.seed, args.source)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {args.rows:,} channels to {args.output} in {elapsed:.1f}s "
+          f"({args.rows / elapsed:,.0f} rows/s, {os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""Append a scraped ranking CSV to the capture store as a new dated capture.
+
+Usage:
+    python -m scripts.ingest_snapshot CSV_PATH [--date YYYY-MM-DD] [--store DIR]
+"""
+import argparse
+import os
+import sys
+import time
+
+from utils.history import HISTORY_DIR, SnapshotStore
+from utils.schema import SchemaError
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv_path', help='CSV file to append')
+    parser.add_argument('--date', help='capture date (default: today)')
+    parser.add_argument('--store', default=os.environ.get('TUBEMETRICS_HISTORY', str(HISTORY_DIR)),
+                        help='capture store directory (default: data/history)')
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.store)
+    start = time.perf_counter()
+    try:
+        path = store.append_csv(args.csv_path, args.date)
+    except (SchemaError, ValueError) as error:
+        sys.exit(f"Not ingested: {error}")
+    print(f"Wrote {path} in {time.perf_counter() - start:.2f}s ({len(store.dates())} captures)")
+
+
+if __name__ == '__main__':
+    main()
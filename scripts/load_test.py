@@ -0,0 +1,271 @@
+"""Simulate concurrent sessions switching filters against a local Streamlit server.
+
+Usage:
+    python -m scripts.load_test [--sessions 20] [--duration 60] [--think 1.0]
+                                [--url ws://localhost:8501] [--pid PID] [--output load.json]
+
+Without --url, a server for Tubemetrics.py is started on a free port (with the
+current TUBEMETRICS_* environment) and stopped afterwards. Each simulated
+session speaks the browser's websocket protocol: it opens a page, then
+repeatedly either picks a random sidebar option or tab, or navigates to
+another page, waiting a random think time between reruns.
+
+Reports throughput, p50/p95/p99 rerun latency per page and overall, and the
+server's resident memory per session. Memory is read for the started server,
+or for --pid when attaching to a running one.
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from utils.data import ROOT_DIR
+
+try:
+    import psutil
+except ImportError:  # memory is then read from /proc, on Linux only
+    psutil = None
+
+STREAM_PATH = '/_stcore/stream'
+
+# Share of actions that navigate to another page rather than change a widget
+NAVIGATE_SHARE = 0.2
+
+
+def resident_mb(pid):
+    """Resident memory of a process and its children in MB, or None if unavailable."""
+    if pid is None:
+        return None
+    if psutil is not None:
+        process = psutil.Process(pid)
+        return sum(p.memory_info().rss for p in [process] + process.children(recursive=True)) / 2**20
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, timeout=60, env=None, stderr=subprocess.DEVNULL):
+    """Start 'streamlit run Tubemetrics.py' on 'port' and wait for its health check.
+
+    'env' replaces the server's environment (default: inherited) and 'stderr'
+    receives its error output.
+    """
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', str(ROOT_DIR / 'Tubemetrics.py'),
+         '--server.headless', 'true', '--server.port', str(port),
+         '--browser.gatherUsageStats', 'false', '--server.fileWatcherType', 'none'],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=stderr,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://localhost:{port}/_stcore/health', timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"server did not become healthy on port {port} within {timeout}s")
+
+
+class Session:
+    """One simulated browser session: its current page, widget values and rerun timings."""
+
+    def __init__(self, url, rng):
+        self.url = url
+        self.rng = rng
+        self.pages = {}  # page name -> script hash, from the server's page list
+        self.page = ''
+        self.widgets = {}  # widget id -> (kind, options) rendered on the current page
+        self.values = {}  # widget id -> WidgetState sent with every rerun
+        self.timings = []  # (page, latency ms, ok)
+
+    async def rerun(self, websocket):
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.page_script_hash = self.pages.get(self.page, '')
+        state.widget_states.widgets.extend(self.values.values())
+        self.widgets = {}
+        start = time.perf_counter()
+        await websocket.send(msg.SerializeToString())
+
+        ok, tab_container = True, None
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await websocket.recv())
+            kind = forward.WhichOneof('type')
+            if kind in ('new_session', 'navigation'):
+                # The page list arrives with the session, then again once the pages/ directory is scanned
+                info = getattr(forward, kind)
+                self.pages = {page.page_name: page.page_script_hash for page in info.app_pages if page.page_name}
+                names = {page_hash: name for name, page_hash in self.pages.items()}
+                self.page = names.get(info.page_script_hash, self.page)
+            elif kind == 'delta':
+                tab_container = self._collect(forward.delta, tab_container)
+                if forward.delta.WhichOneof('type') == 'new_element' and forward.delta.new_element.WhichOneof('type') == 'exception':
+                    ok = False
+            elif kind == 'script_finished':
+                if forward.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                ok = ok and forward.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY
+                break
+        self.timings.append((self.page, (time.perf_counter() - start) * 1000, ok))
+
+    def _collect(self, delta, tab_container):
+        # Remember the selectboxes, multiselects and tabs rendered so actions can pick from them
+        if delta.WhichOneof('type') == 'new_element':
+            element = delta.new_element
+            kind = element.WhichOneof('type')
+            if kind in ('selectbox', 'multiselect'):
+                widget = getattr(element, kind)
+                self.widgets[widget.id] = (kind, list(widget.options))
+        elif delta.WhichOneof('type') == 'add_block':
+            block = delta.add_block
+            kind = block.WhichOneof('type')
+            if kind == 'tab_container' and block.tab_container.id:
+                tab_container = block.tab_container.id
+                self.widgets[tab_container] = ('tab', [])
+            elif kind == 'tab' and tab_container in self.widgets:
+                self.widgets[tab_container][1].append(block.tab.label)
+        return tab_container
+
+    def act(self):
+        """Change one widget to a random option, or navigate to another page."""
+        choices = [widget for widget, (_, options) in self.widgets.items() if len(options) > 1]
+        if not choices or self.rng.random() < NAVIGATE_SHARE:
+            self.page = self.rng.choice(sorted(self.pages))
+            self.values = {}
+            return
+        widget = self.rng.choice(choices)
+        kind, options = self.widgets[widget]
+        state = self.values[widget] = WidgetState(id=widget)
+        if kind == 'multiselect':
+            state.string_array_value.data.append(self.rng.choice(options))
+        else:
+            state.string_value = self.rng.choice(options)
+
+    async def run(self, deadline, think):
+        async with websockets.connect(self.url + STREAM_PATH, subprotocols=['streamlit'],
+                                      max_size=None, open_timeout=30) as websocket:
+            await self.rerun(websocket)
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.rng.uniform(0, 2 * think))
+                self.act()
+                await self.rerun(websocket)
+
+
+def percentiles(latencies):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (float('nan'),) * 3
+    return {'reruns': len(latencies), 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99}
+
+
+async def simulate(url, sessions, duration, think, seed, pid):
+    # Warm up with one session over every page, so the baseline memory includes the shared caches
+    memory = {'idle_mb': resident_mb(pid)}
+    warmup = Session(url, random.Random(seed))
+    async with websockets.connect(url + STREAM_PATH, subprotocols=['streamlit'], max_size=None) as websocket:
+        await warmup.rerun(websocket)
+        for page in sorted(warmup.pages):
+            warmup.page, warmup.values = page, {}
+            await warmup.rerun(websocket)
+    memory['warm_mb'] = resident_mb(pid)
+
+    simulated = [Session(url, random.Random(seed + i + 1)) for i in range(sessions)]
+    start = time.monotonic()
+    outcomes = await asyncio.gather(*(session.run(start + duration, think) for session in simulated),
+                                    return_exceptions=True)
+    elapsed = time.monotonic() - start
+    memory['loaded_mb'] = resident_mb(pid)
+    failed = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+
+    timings = [timing for session in simulated for timing in session.timings]
+    report = {
+        'sessions': sessions,
+        'duration_s': elapsed,
+        'throughput_rps': len(timings) / elapsed,
+        'errors': sum(not ok for _, _, ok in timings) + len(failed),
+        'overall': percentiles([ms for _, ms, _ in timings]),
+        'pages': {page: percentiles([ms for name, ms, _ in timings if name == page])
+                  for page in sorted({name for name, _, _ in timings})},
+        'memory': memory,
+    }
+    if memory['warm_mb'] is not None and memory['loaded_mb'] is not None:
+        memory['per_session_mb'] = (memory['loaded_mb'] - memory['warm_mb']) / sessions
+        memory['first_session_mb'] = memory['warm_mb'] - memory['idle_mb']
+    for error in failed[:5]:
+        print('session failed:', repr(error))
+    return report
+
+
+def print_report(report):
+    print(f"{report['sessions']} sessions for {report['duration_s']:.0f}s: "
+          f"{report['throughput_rps']:.1f} reruns/s, {report['errors']} errors")
+    print(f"{'page':32} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for page, stats in list(report['pages'].items()) + [('overall', report['overall'])]:
+        print(f"{page or 'main':32} {stats['reruns']:7} {stats['p50_ms']:9.1f} {stats['p95_ms']:9.1f} {stats['p99_ms']:9.1f}")
+
+    memory = report['memory']
+    if 'per_session_mb' not in memory:
+        print("Server memory unavailable (pass --pid when attaching with --url)")
+        return
+    print(f"Server memory: {memory['idle_mb']:.0f} MB idle, {memory['warm_mb']:.0f} MB after the first session "
+          f"(+{memory['first_session_mb']:.0f} MB), {memory['loaded_mb']:.0f} MB under load "
+          f"({memory['per_session_mb']:+.1f} MB per extra session)")
+    # Shared caches are paid once by the first session; later sessions should cost far less
+    if memory['first_session_mb'] > 0 and memory['per_session_mb'] > 0.5 * memory['first_session_mb']:
+        print("WARNING: each session costs as much memory as the first; data or figures may not be shared")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=20, help='concurrent sessions (default: 20)')
+    parser.add_argument('--duration', type=float, default=60, help='seconds to run (default: 60)')
+    parser.add_argument('--think', type=float, default=1.0, help='mean seconds between a session\'s reruns (default: 1.0)')
+    parser.add_argument('--url', help='running server, e.g. ws://localhost:8501 (default: start one)')
+    parser.add_argument('--pid', type=int, help='process id of the --url server, for memory readings')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args(argv)
+
+    server, url, pid = None, args.url, args.pid
+    if url is None:
+        port = free_port()
+        server = start_server(port)
+        url, pid = f'ws://localhost:{port}', server.pid
+    try:
+        report = asyncio.run(simulate(url.rstrip('/'), args.sessions, args.duration, args.think, args.seed, pid))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
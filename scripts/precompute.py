@@ -0,0 +1,54 @@
+"""Prebuild the figure of every chart and sidebar selection into an artifact the app loads at startup.
+
+Usage:
+    python -m scripts.precompute [--workers N] [--output PATH] [--backend NAME] [--data PATH]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.backends import create_backend
+from utils.charts import CHARTS, filter_combinations
+from utils.figures import ARTIFACT_PATH, figure_version, filter_key, save_artifact
+
+# Backend opened once per worker process
+_backend = None
+
+
+def _init_worker(name, path):
+    global _backend
+    _backend = create_backend(name, path)
+
+
+def _build(task):
+    page, chart, filters = task
+    spec = CHARTS[page, chart](_backend, **filters).to_json()
+    return page, chart, filter_key(filters), spec
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes (default: CPU count)')
+    parser.add_argument('--output', default=ARTIFACT_PATH, help='artifact path')
+    parser.add_argument('--backend', help='query backend (default: TUBEMETRICS_BACKEND or pandas)')
+    parser.add_argument('--data', help='dataset path (default: TUBEMETRICS_DATA or the bundled CSV)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    backend = create_backend(args.backend, args.data)
+    tasks = list(filter_combinations(backend))
+
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(backend.name, args.data)) as pool:
+        entries = list(pool.map(_build, tasks, chunksize=max(1, len(tasks) // (args.workers * 8))))
+    build_seconds = time.perf_counter() - start
+
+    save_artifact(args.output, figure_version(backend), entries)
+    total_bytes = sum(len(spec) for *_, spec in entries)
+    print(f"Built {len(entries)} figures for {len({(page, chart) for page, chart, *_ in entries})} charts "
+          f"with {args.workers} workers in {build_seconds:.2f}s ({len(entries) / build_seconds:.1f} figures/s)")
+    print(f"Wrote {args.output} ({total_bytes / 1024 / 1024:.1f} MiB of figure specs)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Measure cold start: server boot and the first render of every page on a fresh server.
+
+Usage:
+    python -m scripts.startup [--runs 5] [--imports 15] [--output startup.json]
+
+Each run starts a new server for Tubemetrics.py (with the current TUBEMETRICS_*
+environment) and times it until its health check passes. It then opens one
+session and times the first render of the landing page and of every other
+page in navigation order, as the first user of a freshly started replica sees
+them. Reports the median of each over the runs. With --imports, it also lists
+the slowest module imports made while the pages rendered (from
+python -X importtime), which shows what each cold page pays for.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import websockets
+
+from scripts.load_test import STREAM_PATH, Session, free_port, start_server
+
+
+async def first_renders(url):
+    """(page, latency ms, ok) for the landing page, then every other page in navigation order."""
+    session = Session(url, random.Random(0))
+    async with websockets.connect(url + STREAM_PATH, subprotocols=['streamlit'],
+                                  max_size=None, open_timeout=30) as websocket:
+        await session.rerun(websocket)
+        landing = session.page
+        for page in list(session.pages):
+            if page != landing:
+                session.page, session.values = page, {}
+                await session.rerun(websocket)
+    return session.timings
+
+
+def top_level_imports(text):
+    """{module: cumulative ms} of the outermost imports in 'python -X importtime' output."""
+    imports = {}
+    for line in text.splitlines():
+        # 'import time: self [us] | cumulative | module', nested imports indented by two spaces per level
+        if not line.startswith('import time:') or line.count('|') != 2:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit() or name.startswith('   '):
+            continue
+        imports[name.strip()] = int(cumulative) / 1000
+    return imports
+
+
+def measure(imports=False):
+    """One cold start: boot ms, first-render timings and the imports made while rendering."""
+    env = dict(os.environ, PYTHONPROFILEIMPORTTIME='1') if imports else None
+    with tempfile.TemporaryFile() as log:
+        start = time.perf_counter()
+        server = start_server(free_port(), env=env, stderr=log)
+        boot_ms = (time.perf_counter() - start) * 1000
+        # Imports logged from here on were made by page renders, not by the server's own startup
+        booted_at = os.fstat(log.fileno()).st_size
+        port = server.args[server.args.index('--server.port') + 1]
+        try:
+            timings = asyncio.run(first_renders(f'ws://localhost:{port}'))
+        finally:
+            server.terminate()
+            server.wait()
+        log.seek(booted_at)
+        render_imports = top_level_imports(log.read().decode('utf-8', 'replace'))
+    return boot_ms, timings, render_imports
+
+
+def summarize(runs):
+    boots = [boot_ms for boot_ms, _, _ in runs]
+    pages = {}
+    for _, timings, _ in runs:
+        for page, ms, ok in timings:
+            pages.setdefault(page, []).append((ms, ok))
+    report = {
+        'runs': len(runs),
+        'boot_ms': statistics.median(boots),
+        'pages': {page: {'first_render_ms': statistics.median(ms for ms, _ in results),
+                         'errors': sum(not ok for _, ok in results)} for page, results in pages.items()},
+    }
+    landing = next(iter(report['pages'].values()), None)
+    report['time_to_first_render_ms'] = report['boot_ms'] + (landing['first_render_ms'] if landing else 0)
+    modules = {}
+    for _, _, render_imports in runs:
+        for module, ms in render_imports.items():
+            modules.setdefault(module, []).append(ms)
+    report['imports'] = dict(sorted(((module, statistics.median(times)) for module, times in modules.items()),
+                                    key=lambda item: item[1], reverse=True))
+    return report
+
+
+def print_report(report, imports):
+    print(f"{report['runs']} cold starts: server boot {report['boot_ms']:.0f} ms, "
+          f"time to first render {report['time_to_first_render_ms']:.0f} ms (medians)")
+    print(f"{'page':32} {'first render ms':>16} {'errors':>7}")
+    for page, stats in report['pages'].items():
+        print(f"{page or 'main':32} {stats['first_render_ms']:16.0f} {stats['errors']:7}")
+    if imports:
+        print(f"\nSlowest imports while rendering ({imports} of {len(report['imports'])}):")
+        for module, ms in list(report['imports'].items())[:imports]:
+            print(f"  {module:40} {ms:8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh servers to start (default: 5)')
+    parser.add_argument('--imports', type=int, default=0, help='list the N slowest imports made while rendering')
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = summarize([measure(imports=args.imports > 0) for _ in range(args.runs)])
+    print_report(report, args.imports)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
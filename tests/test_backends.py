@@ -0,0 +1,175 @@
+"""Both query backends must answer every query the pages run identically.
+
+Run from the repository root with: python -m pytest
+"""
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.backends import DuckDBBackend, PandasBackend, create_backend
+from utils.cube import CUBE_METRICS
+from utils.data import DATA_PATH, read_csv, read_dataset
+from utils.schema import MISSING_CATEGORY
+
+STATS = ['sum', 'mean', 'min', 'max', 'count']
+
+
+@pytest.fixture(scope='module')
+def backends(tmp_path_factory):
+    # A copy of the bundled CSV, so the snapshots both backends write stay out of data/
+    path = tmp_path_factory.mktemp('data') / 'channels.csv'
+    shutil.copy(DATA_PATH, path)
+    return PandasBackend(read_dataset(path)), DuckDBBackend(path)
+
+
+@pytest.fixture(scope='module')
+def missing_backends(tmp_path_factory):
+    # The same channels with some categories missing: a CSV for pandas and an untyped Parquet file
+    # (as written by scripts/generate_dataset.py) for DuckDB
+    directory = tmp_path_factory.mktemp('missing')
+    raw = read_csv(DATA_PATH)
+    raw.loc[::7, 'Category'] = None
+    raw.to_csv(directory / 'channels.csv', index=False)
+    raw.to_parquet(directory / 'channels.parquet', index=False)
+    return PandasBackend(read_dataset(directory / 'channels.csv')), DuckDBBackend(directory / 'channels.parquet')
+
+
+@pytest.fixture(scope='module')
+def labels(backends):
+    return backends[0].category_counts()['Category'].tolist()
+
+
+def assert_same(left, right, sort_by=None):
+    left, right = left.reset_index(drop=True), right.reset_index(drop=True)
+    if 'Category' in left:
+        left['Category'] = left['Category'].astype(str)
+        right['Category'] = right['Category'].astype(str)
+    if sort_by:
+        left = left.sort_values(sort_by, kind='stable', ignore_index=True)
+        right = right.sort_values(sort_by, kind='stable', ignore_index=True)
+    assert list(left.columns) == list(right.columns)
+    assert len(left) == len(right)
+    pd.testing.assert_frame_equal(left, right, check_dtype=False, check_column_type=False, check_index_type=False)
+
+
+def category_filters(labels):
+    return [None, (), tuple(labels[:1]), tuple(labels[1:4])]
+
+
+@pytest.mark.parametrize('top_n', [None, 5, 100])
+def test_category_counts(backends, labels, top_n):
+    pandas, duckdb = backends
+    for categories in category_filters(labels):
+        assert_same(pandas.category_counts(top_n, categories), duckdb.category_counts(top_n, categories),
+                    sort_by=['Category'])
+
+
+@pytest.mark.parametrize('metric', CUBE_METRICS)
+@pytest.mark.parametrize('stat', STATS)
+def test_category_aggregate(backends, labels, metric, stat):
+    pandas, duckdb = backends
+    years = pandas.years()
+    for top_n in [None, 25]:
+        for categories in category_filters(labels):
+            for selected_years in [None, [], years[-3:]]:
+                assert_same(pandas.category_aggregate(metric, stat, top_n, categories, selected_years),
+                            duckdb.category_aggregate(metric, stat, top_n, categories, selected_years),
+                            sort_by=['Category'])
+
+
+@pytest.mark.parametrize('metric', CUBE_METRICS)
+def test_top_channels(backends, labels, metric):
+    pandas, duckdb = backends
+    years = pandas.years()
+    for filters in [{}, dict(categories=()), dict(categories=tuple(labels[:2])), dict(years=[]), dict(years=years[-2:])]:
+        expected = pandas.top_channels(metric, 50, **filters)['Rank'].tolist()
+        assert duckdb.top_channels(metric, 50, **filters)['Rank'].tolist() == expected
+
+
+def test_channel_columns(backends):
+    # Both backends return the same columns: the base table plus utils.metrics.TABLE_METRICS
+    pandas, duckdb = backends
+    assert list(duckdb.top_channels('Subscribers', 5).columns) == list(pandas.top_channels('Subscribers', 5).columns)
+
+
+def test_years(backends):
+    pandas, duckdb = backends
+    assert pandas.years() == duckdb.years()
+
+
+def test_sidebar_options_are_queried_once(backends, monkeypatch):
+    pandas, duckdb = backends
+    duckdb.category_counts(), duckdb.years()
+    queries = []
+    monkeypatch.setattr(duckdb, 'query', lambda *args: queries.append(args))
+    counts = duckdb.category_counts()
+    counts['Count'] = 0  # callers get a copy
+    assert_same(pandas.category_counts(), duckdb.category_counts(), sort_by=['Category'])
+    assert duckdb.years() == pandas.years()
+    assert not queries
+
+
+def test_cohort_matrix(backends):
+    pandas, duckdb = backends
+    assert_same(pandas.cohort_matrix(), duckdb.cohort_matrix())
+
+
+def test_sketches(backends, labels):
+    pandas, duckdb = backends
+    quantiles = [0.05, 0.5, 0.95]
+    for metric in ['Subscribers', 'Video Views', 'Views per Video']:
+        for categories in [None, tuple(labels[:3])]:
+            expected = pandas.sketches().quantiles(metric, quantiles, categories=categories)
+            result = duckdb.sketches().quantiles(metric, quantiles, categories=categories)
+            assert_same(expected, result)
+            assert np.isfinite(result[[f'P{q * 100:g}' for q in quantiles]].to_numpy()).all()
+
+
+def test_missing_categories(missing_backends):
+    pandas, duckdb = missing_backends
+    counts = duckdb.category_counts()
+    assert MISSING_CATEGORY in counts['Category'].tolist()
+    assert_same(pandas.category_counts(), counts, sort_by=['Category'])
+    assert_same(pandas.category_aggregate('Views per Video', 'mean'), duckdb.category_aggregate('Views per Video', 'mean'),
+                sort_by=['Category'])
+    assert_same(pandas.cohort_matrix(), duckdb.cohort_matrix())
+
+
+def test_pandas_backend_needs_csv(tmp_path):
+    with pytest.raises(ValueError, match='TUBEMETRICS_BACKEND=duckdb'):
+        create_backend('pandas', tmp_path / 'channels.parquet')
+
+
+def test_csv_snapshot_keeps_existing_parquet(tmp_path):
+    # DuckDB converts a CSV to its own Parquet snapshot, leaving a same-named Parquet file alone
+    shutil.copy(DATA_PATH, tmp_path / 'channels.csv')
+    (tmp_path / 'channels.parquet').write_bytes(b'not ours')
+    backend = DuckDBBackend(tmp_path / 'channels.csv')
+    assert (tmp_path / 'channels.parquet').read_bytes() == b'not ours'
+    assert backend.files == [str(tmp_path / 'channels.typed.parquet')]
+
+
+@pytest.mark.parametrize('query', ['music', 'T-Series', 'pewdipie', 'mr beast', 'zzzzqx', 'the'])
+def test_search(backends, query):
+    pandas, duckdb = backends
+    for limit in [1, 10]:
+        assert duckdb.search(query, limit)['Rank'].tolist() == pandas.search(query, limit)['Rank'].tolist()
+
+
+@pytest.mark.parametrize('query', ['', '   ', '!!', '- -'])
+def test_search_without_words(backends, query):
+    for backend in backends:
+        assert backend.search(query).empty
+
+
+def test_channel_profile(backends):
+    pandas, duckdb = backends
+    ranks = pandas.top_channels('Subscribers', 1000)['Rank'].tolist()
+    # Include channels without videos, which are not ranked by Views per Video
+    unranked = pandas.data.loc[pandas.data['Views per Video'].isna(), 'Rank'].tolist()
+    for rank in ranks[:3] + ranks[500:503] + ranks[-3:] + unranked[:3]:
+        (expected_channel, expected), (channel, profile) = pandas.channel_profile(rank), duckdb.channel_profile(rank)
+        assert channel['Youtuber'] == expected_channel['Youtuber']
+        assert_same(expected, profile)
@@ -0,0 +1,32 @@
+from utils.figures import FigureCache
+
+
+def test_evicts_least_recently_used_past_the_cap():
+    cache = FigureCache(max_bytes=10)
+    cache.put('a', 'aaaa')
+    cache.put('b', 'bbbb')
+    assert cache.get('a') == 'aaaa'  # 'b' is now the least recently used
+    cache.put('c', 'cccc')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'aaaa' and cache.get('c') == 'cccc'
+    assert cache.stats() == {'entries': 2, 'bytes': 8, 'max_bytes': 10, 'hits': 3, 'misses': 1, 'evictions': 1}
+
+
+def test_replacing_a_key_is_counted_once():
+    cache = FigureCache(max_bytes=10)
+    cache.put('a', 'aaaa')
+    cache.put('a', 'aaaaaa')
+    cache.put('b', 'bbbb')
+    assert cache.get('a') == 'aaaaaa'
+    assert cache.stats()['bytes'] == 10
+    assert cache.stats()['evictions'] == 0
+
+
+def test_bytes_stay_within_the_cap():
+    cache = FigureCache(max_bytes=10)
+    for i in range(20):
+        cache.put(i, 'x' * (i % 4 + 1))
+        assert cache.stats()['bytes'] <= 10
+    cache.put('big', 'x' * 11)  # larger than the whole cache: never stored
+    assert cache.get('big') is None
+    assert cache.stats()['bytes'] <= 10
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from utils.data import DATA_PATH, coerce, read_csv
+from utils.history import SnapshotStore, category_totals
+
+
+@pytest.fixture(scope='module')
+def data():
+    return coerce(read_csv(DATA_PATH))
+
+
+@pytest.fixture
+def later(data):
+    # Second capture: the top channel gains subscribers, everything else is unchanged
+    later = data.copy()
+    subscribers = later['Subscribers'].copy()
+    subscribers.iloc[0] += 1_000_000
+    later['Subscribers'] = subscribers
+    return later
+
+
+def test_two_appends_and_duplicate_date(tmp_path, data, later):
+    store = SnapshotStore(tmp_path)
+    store.append(data, '2024-01-01', digest='first')
+    store.append(later, '2024-02-01', digest='second')
+
+    assert store.dates() == ['2024-01-01', '2024-02-01']
+    manifest = store.manifest()
+    assert manifest['2024-02-01']['rows'] == len(later)
+    assert manifest['2024-02-01']['categories'] == category_totals(later)
+    assert not (tmp_path / 'manifest.lock').exists()
+
+    with pytest.raises(ValueError, match='2024-01-01'):
+        store.append(later, '2024-01-01')
+    # The rejected append left the stored capture and the lock untouched
+    assert store.manifest() == manifest
+    assert store.load('2024-01-01')['Subscribers'].equals(data['Subscribers'])
+    assert not (tmp_path / 'manifest.lock').exists()
+
+
+def test_growth_between_captures(tmp_path, data, later):
+    store = SnapshotStore(tmp_path)
+    store.append(data, '2024-01-01', digest='first')
+    store.append(later, '2024-02-01', digest='second')
+
+    growth = store.channel_growth('2024-01-01', '2024-02-01', n=1)
+    assert growth['Youtuber'].tolist() == [data['Youtuber'].iloc[0]]
+    assert growth['Change'].tolist() == [1_000_000]
+
+    categories = store.category_growth('2024-01-01', '2024-02-01')
+    top = categories.iloc[0]
+    assert top['Category'] == data['Category'].iloc[0]
+    assert top['Change'] == 1_000_000
+    assert (categories['Change'].iloc[1:] == 0).all()
+
+
+def test_concurrent_appends_keep_every_capture(tmp_path, data):
+    store = SnapshotStore(tmp_path)
+    dates = [f'2024-0{month}-01' for month in range(1, 5)]
+    threads = [threading.Thread(target=store.append, args=(data, date)) for date in dates]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.dates() == dates
@@ -0,0 +1,44 @@
+import threading
+import tracemalloc
+
+import pytest
+
+from utils import profiling
+
+
+@pytest.fixture(autouse=True)
+def profiled(monkeypatch):
+    monkeypatch.setenv('TUBEMETRICS_PROFILE', '1')
+    assert not tracemalloc.is_tracing()
+
+
+def in_thread(target):
+    # Streamlit runs each rerun in a script thread that is retired once the rerun ends
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+
+
+def test_completed_run_stops_tracing():
+    def rerun():
+        with profiling.run('page'):
+            assert tracemalloc.is_tracing()
+            with profiling.stage('work'):
+                pass
+    in_thread(rerun)
+    assert not tracemalloc.is_tracing()
+    assert profiling._tracing == {'runs': 0, 'owned': False}
+
+
+def test_interrupted_run_stops_tracing():
+    # Streamlit ends a rerun cut short by the next interaction with an exception in its script thread
+    class Interrupted(BaseException):
+        pass
+
+    def rerun():
+        with pytest.raises(Interrupted):
+            with profiling.run('page'):
+                raise Interrupted
+    in_thread(rerun)
+    assert not tracemalloc.is_tracing()
+    assert profiling._tracing == {'runs': 0, 'owned': False}
@@ -0,0 +1,57 @@
+import pytest
+
+from utils.data import DATA_PATH, read_csv
+from utils.schema import MISSING_CATEGORY, SCHEMA, SchemaError, enforce
+
+
+@pytest.fixture
+def raw():
+    return read_csv(DATA_PATH).head(5).copy()
+
+
+def test_dtypes_match_schema(raw):
+    typed = enforce(raw)
+    assert list(typed.columns[:len(SCHEMA)]) == list(SCHEMA)
+    for column, dtype in SCHEMA.items():
+        assert typed[column].dtype == dtype, column
+
+
+def test_missing_category_is_labelled(raw):
+    raw.loc[1, 'Category'] = None
+    assert enforce(raw)['Category'].tolist()[1] == MISSING_CATEGORY
+
+
+def test_reports_every_bad_value(raw):
+    raw['Subscribers'] = raw['Subscribers'].astype(object)
+    raw['Video Count'] = raw['Video Count'].astype('float64')
+    raw.loc[0, 'Subscribers'] = -5
+    raw.loc[1, 'Video Count'] = 2.5
+    raw.loc[2, 'Started'] = 1800
+    raw.loc[3, 'Subscribers'] = 'many'
+    raw.loc[4, 'Youtuber'] = None
+    with pytest.raises(SchemaError) as error:
+        enforce(raw)
+    problems = [(row, column, reason) for row, column, _, reason in error.value.problems]
+    assert problems == [
+        (0, 'Subscribers', 'expected an integer in [0, 9223372036854775808]'),
+        (1, 'Video Count', 'expected an integer in [0, 9223372036854775808]'),
+        (2, 'Started', 'expected an integer in [1900, 2100]'),
+        (3, 'Subscribers', 'expected an integer in [0, 9223372036854775808]'),
+        (4, 'Youtuber', 'missing channel name'),
+    ]
+    assert [value for _, _, value, _ in error.value.problems[:4]] == [-5, 2.5, 1800, 'many']
+    assert 'row 3, Subscribers=many' in str(error.value)
+
+
+def test_missing_values_are_reported(raw):
+    raw['Video Views'] = raw['Video Views'].astype('float64')
+    raw.loc[2, 'Video Views'] = float('nan')
+    with pytest.raises(SchemaError) as error:
+        enforce(raw)
+    assert [(row, column) for row, column, _, _ in error.value.problems] == [(2, 'Video Views')]
+
+
+def test_missing_columns_are_reported(raw):
+    with pytest.raises(SchemaError) as error:
+        enforce(raw.drop(columns=['Started', 'Category']))
+    assert error.value.problems == [(None, 'Category', None, 'missing column'), (None, 'Started', None, 'missing column')]
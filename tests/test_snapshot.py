@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from utils import snapshot
+from utils.data import DATA_PATH, coerce, read_csv
+
+
+@pytest.fixture(scope='module')
+def data():
+    return coerce(read_csv(DATA_PATH))
+
+
+@pytest.mark.parametrize('suffix', ['.arrow', '.parquet'])
+def test_touched_csv_is_rehashed_once(tmp_path, data, suffix):
+    path = snapshot.write_snapshot(data, str(tmp_path / f'channels{suffix}'), (1, 100), 'abc')
+    hashes = []
+
+    def file_hash():
+        hashes.append(1)
+        return 'abc'
+
+    # Same content under a new mtime: hashed once, then the snapshot carries the new stamp
+    assert snapshot.is_fresh(path, (2, 100), file_hash)
+    assert snapshot.is_fresh(path, (2, 100), file_hash)
+    assert len(hashes) == 1
+    assert snapshot.read_source(path) == {'stamp': [2, 100], 'hash': 'abc', 'format': snapshot.FORMAT_VERSION}
+    assert not snapshot.is_fresh(path, (3, 100), lambda: 'changed')
+
+
+def test_writers_use_their_own_temporary_files(tmp_path):
+    target = str(tmp_path / 'artifact.json')
+    with snapshot.atomic_path(target) as first, snapshot.atomic_path(target) as second:
+        assert first != second
+        for path, text in [(first, 'first'), (second, 'second')]:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+    with open(target, encoding='utf-8') as f:
+        assert f.read() == 'first'
+    assert os.listdir(tmp_path) == ['artifact.json']
+
+
+def test_failed_write_leaves_no_temporary_file(tmp_path):
+    target = tmp_path / 'artifact.json'
+    with pytest.raises(RuntimeError):
+        with snapshot.atomic_path(str(target)):
+            raise RuntimeError
+    assert not os.listdir(tmp_path)
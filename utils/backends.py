@@ -0,0 +1,412 @@
+import glob
+import hashlib
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils import metrics, schema, snapshot
+from utils.cube import aggregate_cube, cohort_shares
+from utils.data import DATA_PATH, coerce, dataset_version, file_hash, file_stamp, load_data, read_csv
+from utils.profiling import stage
+from utils.ranking import RANK_METRICS, rank_index
+from utils.search import MIN_SIMILARITY, channel_index, normalize, trigram_codes, word_suffixes
+from utils.sketches import SKETCH_METRICS, SketchCube, sketch_cube, sql_bucket_index
+
+# Groups a channel is ranked within on its drill-down, by the label shown
+PROFILE_GROUPS = {'Overall': None, 'Category': 'Category', 'Cohort': 'Started'}
+
+# Default backend, overridable with TUBEMETRICS_BACKEND
+DEFAULT_BACKEND = 'pandas'
+
+
+class Backend(ABC):
+    """Queries the pages run against the channel table.
+
+    Results are small pandas frames (at most N channels or one row per
+    category), so pages and charts never touch the full table directly.
+    'version' identifies the dataset contents for keying caches.
+    """
+
+    name = None
+    version = ''
+
+    @abstractmethod
+    def category_counts(self, top_n=None, categories=None):
+        """Channels per category among the top N by Subscribers, as ['Category', 'Count'], largest first."""
+
+    @abstractmethod
+    def category_aggregate(self, metric, stat, top_n=None, categories=None, years=None):
+        """One statistic ('sum', 'mean', 'min', 'max' or 'count') of 'metric' per category, as ['Category', metric].
+
+        Rows are the top N channels by Subscribers over the whole table, then
+        restricted to 'categories' and 'years'.
+        """
+
+    @abstractmethod
+    def top_channels(self, metric, n, categories=None, years=None):
+        """The top 'n' channels by 'metric' among 'categories' or 'years' (at most one of them), largest first."""
+
+    @abstractmethod
+    def years(self):
+        """Sorted distinct 'Started' years."""
+
+    @abstractmethod
+    def search(self, query, limit=10):
+        """Channels whose names start with, or closely resemble, 'query', best matches first."""
+
+    def cohort_matrix(self):
+        """The (Started x Category) cohort matrix of utils.cube.COHORT_METRICS, one row per cohort, cached per dataset version."""
+        return _cohort_matrix(self.name, self.version, self)
+
+    @abstractmethod
+    def _cohort_cells(self):
+        """Started, Category, Channels, COHORT_TOTALS and 'Top Subscribers' per cohort."""
+
+    @abstractmethod
+    def sketches(self):
+        """Distribution sketches (utils.sketches.SketchCube) per category and start year, built on first use."""
+
+    @abstractmethod
+    def channel_profile(self, rank):
+        """The channel with this 'Rank' and its ranking on every metric, as (row, frame).
+
+        The frame has one row per metric with the channel's rank and percentile
+        overall, within its category and within its start-year cohort.
+        """
+
+
+def profile_frame(values, positions):
+    """Build a channel_profile frame from {metric: value} and {(metric, group): (0-based rank, ranked rows)}."""
+    rows = []
+    for metric, value in values.items():
+        row = {'Metric': metric, 'Value': None if pd.isna(value) else f'{value:,.0f}' if float(value).is_integer() else f'{value:,.1f}'}
+        for group in PROFILE_GROUPS:
+            rank, count = positions[metric, group]
+            ranked = not pd.isna(value) and rank < count
+            # Percentile: share of the group ranked at or below the channel, ties in Rank order like the rankings
+            row[f'{group} Rank'] = f'{rank + 1:,} of {count:,}' if ranked else None
+            row[f'{group} Percentile'] = round((count - rank) / count * 100, 1) if ranked else None
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+class PandasBackend(Backend):
+    """In-memory backend over the shared DataFrame, its rank index and aggregate cube."""
+
+    name = 'pandas'
+
+    def __init__(self, data):
+        self.data = data
+        self.version = dataset_version(data)
+        self.ranks = rank_index(data)
+        self.cube = aggregate_cube(data)
+
+    def category_counts(self, top_n=None, categories=None):
+        return self.cube.counts(top_n=top_n, categories=categories)
+
+    def category_aggregate(self, metric, stat, top_n=None, categories=None, years=None):
+        return self.cube.aggregate(metric, stat, top_n=top_n, categories=categories, years=years)
+
+    def top_channels(self, metric, n, categories=None, years=None):
+        if categories is not None and years is not None:
+            raise ValueError("top_channels filters by categories or years, not both")
+        if categories is not None:
+            return self.ranks.top_frame(metric, n, 'Category', categories)
+        if years is not None:
+            return self.ranks.top_frame(metric, n, 'Started', years)
+        return self.ranks.top_frame(metric, n)
+
+    def years(self):
+        return sorted(self.ranks.group_orders['Started', 'Subscribers'])
+
+    def _cohort_cells(self):
+        return self.cube.cohort_cells()
+
+    def sketches(self):
+        # Cached per dataset version, like the cube, but only the Distributions tab needs it
+        return sketch_cube(self.data)
+
+    def search(self, query, limit=10):
+        index = channel_index(self.data, self.ranks.ranks['Subscribers'])
+        return self.data.iloc[index.search(query, limit)]
+
+    def channel_profile(self, rank):
+        ranks = self.data['Rank'].to_numpy()
+        # Rows are normally stored in Rank order; otherwise look the rank up
+        row = rank - 1 if 0 < rank <= len(ranks) and ranks[rank - 1] == rank else int(np.flatnonzero(ranks == rank)[0])
+        channel = self.data.iloc[row]
+        positions = {(metric, group): self.ranks.position(metric, row, column)
+                     for metric in RANK_METRICS for group, column in PROFILE_GROUPS.items()}
+        return channel, profile_frame({metric: channel[metric] for metric in RANK_METRICS}, positions)
+
+
+class DuckDBBackend(Backend):
+    """Embedded DuckDB backend over Parquet files.
+
+    Only the columns and row groups a query needs are read: filters and
+    projections are pushed into the Parquet scan, so the table never has to
+    fit in memory. A CSV source is converted once to a typed Parquet file
+    next to it, rebuilt when the CSV changes.
+    """
+
+    name = 'duckdb'
+
+    # SQL aggregate for each statistic; sums of only missing values are 0, as in pandas
+    STATS = {'sum': 'COALESCE(SUM({}), 0)', 'mean': 'AVG({})', 'min': 'MIN({})', 'max': 'MAX({})', 'count': 'COUNT({})'}
+
+    def __init__(self, path):
+        import duckdb
+
+        self.files, self.version = self._resolve(str(path))
+        self.connection = duckdb.connect()
+        self.local = threading.local()
+        files = ', '.join("'" + file.replace("'", "''") + "'" for file in self.files)
+        # Derived metrics come from the shared registry, with the same zero policies as pandas (NULL for NaN);
+        # missing categories get the label the pandas loader gives them
+        self.connection.execute(f"""
+            CREATE VIEW channels AS
+            SELECT Rank, Youtuber, Subscribers, "Video Views", "Video Count",
+                   COALESCE(CAST(Category AS VARCHAR), '{schema.MISSING_CATEGORY}') AS Category, Started,
+                   {metrics.sql_columns()}
+            FROM read_parquet([{files}])
+        """)
+        # Results that only change with the dataset, computed on first use (see _once)
+        self.memo = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _resolve(path):
+        # A CSV becomes a typed Parquet snapshot, named so it never replaces a user's own '<name>.parquet';
+        # Parquet files (or a glob of them) are read as-is
+        if path.endswith('.csv'):
+            parquet_path = snapshot.snapshot_path(path, '.typed.parquet')
+            stamp = file_stamp(path)
+            if not snapshot.is_fresh(parquet_path, stamp, lambda: file_hash(path)):
+                snapshot.write_snapshot(coerce(read_csv(path)), parquet_path, stamp, file_hash(path))
+            return [parquet_path], snapshot.read_source(parquet_path)['hash'][:12]
+
+        files = sorted(glob.glob(path))
+        if not files:
+            raise FileNotFoundError(path)
+        identity = hashlib.sha1(repr([(file, file_stamp(file)) for file in files]).encode())
+        return files, identity.hexdigest()[:12]
+
+    def cursor(self):
+        # One cursor per thread: DuckDB connections must not be shared between threads
+        cursor = getattr(self.local, 'cursor', None)
+        if cursor is None:
+            cursor = self.local.cursor = self.connection.cursor()
+        return cursor
+
+    def query(self, sql, params=()):
+        with stage('duckdb query'):
+            return self.cursor().execute(sql, list(params)).df()
+
+    @staticmethod
+    def _where(categories=None, years=None):
+        # An empty selection matches nothing, as in pandas; 'IN ()' is not valid SQL
+        clauses, params = [], []
+        if categories is not None:
+            clauses.append(f"Category IN ({', '.join('?' * len(categories))})" if len(categories) else 'FALSE')
+            params += list(categories)
+        if years is not None:
+            clauses.append(f"Started IN ({', '.join('?' * len(years))})" if len(years) else 'FALSE')
+            params += [int(year) for year in years]
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    @staticmethod
+    def _source(top_n, columns):
+        # Global top N by Subscribers (ties in Rank order, like nlargest keep='first') or the whole table
+        if top_n is None:
+            return 'channels', []
+        return f'(SELECT {columns} FROM channels ORDER BY Subscribers DESC, Rank LIMIT ?)', [int(top_n)]
+
+    def _once(self, name, build):
+        # The backend is shared per dataset version, so version-invariant results (the sidebar's options,
+        # sketches, index tables) are built once, by the first session to need them; one lock per result
+        # keeps a slow build from holding up the others
+        with self.lock:
+            lock = self.locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self.memo:
+                self.memo[name] = build()
+        return self.memo[name]
+
+    def category_counts(self, top_n=None, categories=None):
+        if top_n is None and categories is None:
+            # Every page's category options: a full scan, so computed once
+            return self._once('category_counts', lambda: self._category_counts()).copy()
+        return self._category_counts(top_n, categories)
+
+    def _category_counts(self, top_n=None, categories=None):
+        source, params = self._source(top_n, 'Category')
+        where, where_params = self._where(categories)
+        return self.query(f"SELECT Category, COUNT(*) AS Count FROM {source}{where} "
+                          f"GROUP BY Category ORDER BY Count DESC, Category", params + where_params)
+
+    def category_aggregate(self, metric, stat, top_n=None, categories=None, years=None):
+        if metric not in RANK_METRICS or stat not in self.STATS:
+            raise ValueError(f"unknown metric or statistic: {metric!r}, {stat!r}")
+        source, params = self._source(top_n, f'Category, Started, "{metric}"')
+        where, where_params = self._where(categories, years)
+        aggregate = self.STATS[stat].format(f'"{metric}"')
+        return self.query(f'SELECT Category, {aggregate} AS "{metric}" FROM {source}{where} '
+                          f'GROUP BY Category ORDER BY Category', params + where_params)
+
+    def top_channels(self, metric, n, categories=None, years=None):
+        if metric not in RANK_METRICS:
+            raise ValueError(f"unknown metric: {metric!r}")
+        where, params = self._where(categories, years)
+        return self.query(f'SELECT * FROM channels{where} ORDER BY "{metric}" DESC, Rank LIMIT ?', params + [int(n)])
+
+    def years(self):
+        # Every page's year options: a full scan, so computed once
+        years = self._once('years', lambda: self.query('SELECT DISTINCT Started FROM channels ORDER BY Started'))
+        return years['Started'].tolist()
+
+    def _cohort_cells(self):
+        return self.query("""
+            SELECT Started, Category, COUNT(*) AS Channels,
+                   COALESCE(SUM(Subscribers), 0) AS Subscribers, COALESCE(SUM("Video Views"), 0) AS "Video Views",
+                   COALESCE(SUM("Video Count"), 0) AS "Video Count", MAX(Subscribers) AS "Top Subscribers"
+            FROM channels GROUP BY ALL
+        """)
+
+    def _build_sketches(self):
+        # One aggregation per metric: channels per (category, year, sketch bucket), zeros under a NULL
+        # bucket and NULLs left out
+        cells = ' UNION ALL '.join(
+            f'SELECT \'{metric}\' AS Metric, Category, Started, '
+            f'CASE WHEN "{metric}" > 0 THEN {sql_bucket_index(metric)} END AS Bucket, COUNT(*) AS Count '
+            f'FROM channels WHERE "{metric}" IS NOT NULL GROUP BY ALL'
+            for metric in SKETCH_METRICS)
+        with stage('sketch build'):
+            return SketchCube.from_cells(self.query(cells))
+
+    def sketches(self):
+        return self._once('sketches', self._build_sketches)
+
+    def _build_indexes(self):
+        # In-memory tables that search and channel_profile read instead of scanning every channel:
+        # - ranks: each channel's 0-based rank by every metric, overall and within its groups, ordered as
+        #   in top_channels (ties in Rank order, NULLs last); rank_counts: ranked channels per cohort cell
+        # - names: channels by subscribers (id 0 = most subscribed) with the trigram count of their name;
+        #   name_keys and name_trigrams: the word suffixes and trigrams of utils.search.ChannelIndex.
+        # Every table is sorted by its lookup column, so a lookup only reads the row groups holding its key.
+        cursor = self.cursor()
+        with stage('rank index build'):
+            partitions = {group: '' if column is None else f'PARTITION BY "{column}" ' for group, column in PROFILE_GROUPS.items()}
+            ranks = ', '.join(
+                f'CAST(ROW_NUMBER() OVER ({partitions[group]}ORDER BY "{metric}" DESC NULLS LAST, Rank) - 1 AS INTEGER) '
+                f'AS "{metric} {group}"' for metric in RANK_METRICS for group in PROFILE_GROUPS)
+            cursor.execute(f'CREATE TABLE ranks AS SELECT Rank, {ranks} FROM channels ORDER BY Rank')
+            counts = ', '.join(f'COUNT("{metric}") AS "{metric}"' for metric in RANK_METRICS)
+            cursor.execute(f'CREATE TABLE rank_counts AS SELECT Category, Started, {counts} FROM channels GROUP BY ALL')
+        with stage('search index build'):
+            names = self.query('SELECT Rank, Youtuber FROM channels ORDER BY Subscribers DESC NULLS LAST, Rank')
+            keys = [normalize(name) for name in names['Youtuber'].tolist()]
+            codes, rows = trigram_codes(keys)
+            suffixes = pd.DataFrame(word_suffixes(keys), columns=['key', 'id'])
+            suffixes['Rank'] = names['Rank'].to_numpy()[suffixes['id'].to_numpy()]
+            frames = {
+                'names': pd.DataFrame({'id': np.arange(len(keys), dtype=np.int32), 'Rank': names['Rank'],
+                                       'grams': np.bincount(rows, minlength=len(keys)).astype(np.int32)}),
+                'name_keys': suffixes,
+                'name_trigrams': pd.DataFrame({'gram': codes.astype(np.int64), 'id': rows.astype(np.int32)}),
+            }
+            # names and name_trigrams are built in order; only the word suffixes need sorting
+            for table, order in [('names', ''), ('name_keys', ' ORDER BY key'), ('name_trigrams', '')]:
+                cursor.register('frame', frames[table])
+                cursor.execute(f'CREATE TABLE {table} AS SELECT * FROM frame{order}')
+                cursor.unregister('frame')
+
+    def indexes(self):
+        self._once('indexes', self._build_indexes)
+
+    def search(self, query, limit=10):
+        # The matches of utils.search.ChannelIndex, in its order: names with a word starting with the
+        # query, most subscribed first, then the names sharing the most trigrams with it
+        key = normalize(query)
+        if not key:
+            return self.query('SELECT * FROM channels LIMIT 0')
+        self.indexes()
+        with stage('channel search'):
+            matches = self.query('SELECT DISTINCT id, Rank FROM name_keys WHERE key >= ? AND key < ? ORDER BY id LIMIT ?',
+                                 [key, key + '\U0010ffff', int(limit)])['Rank'].tolist()
+            if len(matches) < limit:
+                grams = trigram_codes([key])[0].tolist()
+                similarity = 'shared / (? + grams - shared)'
+                fuzzy = self.query(f"""
+                    SELECT Rank FROM (
+                        SELECT id, COUNT(*) AS shared FROM name_trigrams
+                        WHERE gram IN ({', '.join('?' * len(grams))}) GROUP BY id
+                    ) JOIN names USING (id)
+                    WHERE {similarity} >= ? ORDER BY {similarity} DESC, id LIMIT ?
+                """, grams + [len(grams), MIN_SIMILARITY, len(grams), int(limit)])['Rank'].tolist()
+                seen = set(matches)
+                matches += [rank for rank in fuzzy if rank not in seen][:limit - len(matches)]
+            rows = self.query(f"SELECT * FROM channels WHERE Rank IN ({', '.join('?' * len(matches)) or 'NULL'})", matches)
+            return rows.iloc[pd.Index(rows['Rank']).get_indexer(matches)].reset_index(drop=True)
+
+    def channel_profile(self, rank):
+        channel = self.query('SELECT * FROM channels WHERE Rank = ?', [int(rank)]).iloc[0]
+        self.indexes()
+        ranks = self.query('SELECT * FROM ranks WHERE Rank = ?', [int(rank)]).iloc[0]
+        # Ranked channels in the channel's groups, summed over the cohort cells
+        scopes = {column: channel[column].item() if hasattr(channel[column], 'item') else channel[column]
+                  for column in PROFILE_GROUPS.values() if column is not None}
+        counts = ', '.join(f'SUM("{metric}")' + ('' if column is None else f' FILTER (WHERE "{column}" IS NOT DISTINCT FROM ?)')
+                           for metric in RANK_METRICS for column in PROFILE_GROUPS.values())
+        params = [scopes[column] for metric in RANK_METRICS for column in PROFILE_GROUPS.values() if column is not None]
+        counts = iter(self.query(f'SELECT {counts} FROM rank_counts', params).iloc[0].tolist())
+        positions = {(metric, group): (int(ranks[f'{metric} {group}']), int(next(counts)))
+                     for metric in RANK_METRICS for group in PROFILE_GROUPS}
+        return channel, profile_frame({metric: channel[metric] for metric in RANK_METRICS}, positions)
+
+
+def csv_path(path):
+    """'path' if it names a CSV file, which is what the pandas backend loads; Parquet is read by DuckDB."""
+    if not path.lower().endswith('.csv'):
+        raise ValueError(f"the pandas backend reads a CSV file, got {path!r}; "
+                         "set TUBEMETRICS_BACKEND=duckdb to query Parquet files")
+    return path
+
+
+def create_backend(name=None, path=None):
+    """Build a backend by name ('pandas' or 'duckdb') over a dataset path, without caching."""
+    name = name or os.environ.get('TUBEMETRICS_BACKEND', DEFAULT_BACKEND)
+    path = str(path or os.environ.get('TUBEMETRICS_DATA', DATA_PATH))
+    if name == 'pandas':
+        return PandasBackend(load_data(csv_path(path)))
+    if name == 'duckdb':
+        return DuckDBBackend(path)
+    raise ValueError(f"unknown backend {name!r}, expected 'pandas' or 'duckdb'")
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cohort_matrix(name, version, _source):
+    return cohort_shares(_source._cohort_cells())
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _backend(name, path, stamp):
+    return create_backend(name, path)
+
+
+def get_backend():
+    """The backend selected by TUBEMETRICS_BACKEND over TUBEMETRICS_DATA, shared across sessions.
+
+    It is rebuilt when the dataset files change.
+    """
+    name = os.environ.get('TUBEMETRICS_BACKEND', DEFAULT_BACKEND)
+    path = str(os.environ.get('TUBEMETRICS_DATA', DATA_PATH))
+    if name == 'pandas':
+        # load_data tracks the file version itself; the rank index and cube are cached per version
+        return PandasBackend(load_data(csv_path(path)))
+    stamp = tuple(file_stamp(file) for file in sorted(glob.glob(path)))
+    return _backend(name, path, stamp)
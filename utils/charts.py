@@ -0,0 +1,384 @@
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from utils.cube import COHORT_METRICS
+from utils.profiling import stage
+
+# plotly.express is imported inside the builders that use it, so pages served from the figure cache
+# (or a precomputed artifact) never pay for importing it
+
+# Each chart builder takes the query backend (utils.backends) plus the page's filter values and returns a Plotly figure.
+# 'categories' is None when 'Select All' is selected, otherwise a tuple of category labels.
+
+# Rendering of large charts, set with TUBEMETRICS_RENDER: 'auto' (default) draws scatters with WebGL above
+# WEBGL_POINTS points and bins them above TUBEMETRICS_MAX_POINTS, and folds bars beyond TUBEMETRICS_MAX_BARS
+# into one 'Other' bar, so figure payloads stay bounded whatever the row count; 'full' draws every mark as SVG
+RENDER_MODE = os.environ.get('TUBEMETRICS_RENDER', 'auto')
+WEBGL_POINTS = 500
+MAX_POINTS = int(os.environ.get('TUBEMETRICS_MAX_POINTS', 2000))
+MAX_BARS = int(os.environ.get('TUBEMETRICS_MAX_BARS', 100))
+
+# Bins per axis when a scatter is aggregated server-side
+SCATTER_BINS = 24
+
+# Quantiles each violin is drawn from: evenly spaced, so the violin's density follows the sketch's
+VIOLIN_QUANTILES = np.linspace(0.005, 0.995, 100)
+
+# Top N options offered in each page's sidebar
+TOP_N_OPTIONS = {
+    'categorical': [1000, 500, 100, 25, 10, 5],
+    'yearly': [10, 25, 100, 500, 1000],
+    'views_per_video': [5, 10, 25, 100, 500, 1000],
+    'comparative': [5, 10, 25, 100, 500, 1000],
+}
+
+
+def highlight_first(count):
+    # Create a color list where the top bar is red and others are a default color
+    return ['red' if i == 0 else '#33a8ff' for i in range(count)]
+
+
+def highlight_last(count):
+    # Create a color list where the last (top) bar is red and others are a default color
+    return ['red' if i == count - 1 else '#33a8ff' for i in range(count)]
+
+
+def render_key():
+    """Identity of the rendering settings, so cached figures are only reused under the same ones."""
+    return f'{RENDER_MODE}-{MAX_POINTS}-{MAX_BARS}'
+
+
+def fold_bars(data, label, value):
+    # Above MAX_BARS, keep the largest bars and fold the rest into one 'Other' bar showing their average
+    if RENDER_MODE == 'full' or len(data) <= MAX_BARS:
+        return data
+    with stage('downsampling'):
+        data = data.sort_values(value, ascending=False, kind='stable')
+        head, rest = data.iloc[:MAX_BARS - 1], data.iloc[MAX_BARS - 1:]
+        other = {label: f'Other ({len(rest)} channels, average)', value: rest[value].mean()}
+        if 'Category' in data:
+            other['Category'] = 'Other'
+        return pd.concat([head[[column for column in data if column in (label, value, 'Category')]],
+                          pd.DataFrame([other])], ignore_index=True)
+
+
+def bin_points(data, x, y, size, color):
+    # Aggregate a scatter into log-spaced SCATTER_BINS x SCATTER_BINS cells per color group:
+    # one bubble per non-empty cell at the cell's mean position, sized by the summed 'size'
+    with stage('downsampling'):
+        cells = {}
+        for axis in (x, y):
+            values = np.log10(data[axis].to_numpy(dtype='float64') + 1)
+            edges = np.linspace(values.min(), values.max(), SCATTER_BINS + 1)
+            cells[axis + ' bin'] = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, SCATTER_BINS - 1)
+        binned = data[[x, y, size, color]].assign(**cells).groupby(
+            [color, x + ' bin', y + ' bin'], observed=True, dropna=False).agg(
+            **{x: (x, 'mean'), y: (y, 'mean'), size: (size, 'sum'), 'Channels': (x, 'size')}).reset_index()
+        binned['Youtuber'] = binned['Channels'].astype(str) + ' channels'
+        return binned.drop(columns=[x + ' bin', y + ' bin'])
+
+
+# Categorical Analysis
+def categorical_top_channels(backend, top_n, categories):
+    # Apply top N filter, then the category filter
+    top = backend.top_channels('Subscribers', top_n)
+    if categories is not None:
+        with stage('filter'):
+            top = top[top['Category'].isin(categories)]
+    return top
+
+
+def category_count_figure(backend, top_n, categories):
+    import plotly.express as px
+    # Count occurrences per category, largest first
+    category_count = backend.category_counts(top_n, categories)
+
+    # Create bar chart using Plotly Express
+    fig = px.bar(category_count, x='Category', y='Count', title='YouTube Category Counts', labels={'Count': 'Count', 'Category': 'YouTube Category'})
+
+    # Update the bar color
+    fig.update_traces(marker=dict(color=highlight_first(len(category_count))))
+    return fig
+
+
+def category_subscribers_figure(backend, top_n, categories):
+    import plotly.express as px
+    # Sum subscribers per category
+    category_subscribers = backend.category_aggregate('Subscribers', 'sum', top_n, categories)
+
+    # Create Treemap using Plotly Express
+    fig = px.treemap(category_subscribers, path=['Category'], values='Subscribers',
+                     title='Subscribers by YouTube Category',
+                     color='Subscribers', hover_data=['Subscribers', 'Category'],
+                     color_continuous_scale=px.colors.sequential.Viridis[::-1],  # Change the color palette
+                     labels={'Subscribers': 'Subscribers'})
+
+    # Customize hover template to display count
+    fig.update_traces(textinfo='label+value')
+    return fig
+
+
+def category_views_figure(backend, top_n, categories):
+    import plotly.express as px
+    # Sum video views per category and sort
+    category_views = backend.category_aggregate('Video Views', 'sum', top_n, categories)
+    category_views_sorted = category_views.sort_values(by='Video Views', ascending=False)
+
+    # Create Bar Chart for Video Views
+    fig = px.bar(category_views_sorted, x='Category', y='Video Views',
+                 title='Total Video Views by YouTube Category',
+                 labels={'Video Views': 'Total Video Views', 'Category': 'YouTube Category'})
+
+    # Update the bar color
+    fig.update_traces(marker=dict(color=highlight_first(len(category_views_sorted))))
+    return fig
+
+
+def category_video_counts_figure(backend, top_n, categories):
+    import plotly.express as px
+    # Sum video counts per category and sort
+    category_counts = backend.category_aggregate('Video Count', 'sum', top_n, categories)
+    category_counts_sorted = category_counts.sort_values(by='Video Count', ascending=False)
+
+    # Create Bar Chart for Video Counts
+    fig = px.bar(category_counts_sorted, x='Category', y='Video Count',
+                 title='Total Video Counts by YouTube Category',
+                 labels={'Video Count': 'Total Video Counts', 'Category': 'YouTube Category'})
+
+    # Update the bar color
+    fig.update_traces(marker=dict(color=highlight_first(len(category_counts_sorted))))
+    return fig
+
+
+def category_bubble_figure(backend, top_n, categories):
+    import plotly.express as px
+    # Create bubble chart based on Subscribers, Video Count, and Video Views; large selections are binned
+    # server-side and drawn with WebGL (see RENDER_MODE)
+    top = categorical_top_channels(backend, top_n, categories)
+    render_mode = 'svg' if RENDER_MODE == 'full' or len(top) <= WEBGL_POINTS else 'webgl'
+    if RENDER_MODE != 'full' and len(top) > MAX_POINTS:
+        top = bin_points(top, 'Subscribers', 'Video Count', 'Video Views', 'Category')
+    fig = px.scatter(top, x='Subscribers', y='Video Count', size='Video Views', color='Category',
+                     hover_name='Youtuber', size_max=30, title='Subscribers vs. Video Count vs. Video Views',
+                     color_discrete_sequence=px.colors.qualitative.Light24, render_mode=render_mode)
+
+    fig.update_layout(xaxis=dict(title='Subscribers'),
+                      yaxis=dict(title='Video Count'),
+                      showlegend=True)
+    return fig
+
+
+# Yearly Analysis
+def yearly_top_channels(backend, top_n, year):
+    # Filter data by selected year and top N YouTubers (sorted by Subscribers in descending order)
+    return backend.top_channels('Subscribers', top_n, years=[year])
+
+
+def yearly_subscribers_figure(backend, top_n, year):
+    import plotly.express as px
+    # Create a bar chart for top YouTubers by year
+    top = fold_bars(yearly_top_channels(backend, top_n, year), 'Youtuber', 'Subscribers')
+    fig = px.bar(top, x='Youtuber', y='Subscribers', color='Category',
+                 title=f'Top YouTuber(s) in {year} by Subscribers',
+                 labels={'Subscribers': 'Subscribers', 'Youtuber': 'Top YouTuber(s)'})
+    fig.update_xaxes(title='Top YouTuber(s)')
+    fig.update_yaxes(title='Subscribers')
+    fig.update_layout(showlegend=True)
+    return fig
+
+
+def category_growth_figure(growth, metric, start, end):
+    import plotly.express as px
+    # Bar chart of the per-category change between two captures (utils.history), largest first
+    fig = px.bar(growth, x='Category', y='Change', hover_data=['Before', 'After', 'Change %'],
+                 title=f'{metric} Growth by Category, {start} to {end}',
+                 labels={'Change': f'{metric} Change', 'Category': 'YouTube Category'})
+    fig.update_traces(marker=dict(color=highlight_first(len(growth))))
+    return fig
+
+
+def cohort_heatmap_figure(backend, metric):
+    import plotly.express as px
+    # Heatmap of one cohort metric over every start year (columns) and category (rows)
+    matrix = backend.cohort_matrix().pivot(index='Category', columns='Started', values=metric)
+    fig = px.imshow(matrix, aspect='auto', color_continuous_scale='Blues',
+                    labels=dict(x='Start Year', y='Category', color=metric),
+                    title=f'{metric} by Start Year and Category')
+    fig.update_xaxes(type='category')
+    return fig
+
+
+def cohort_trends_figure(backend, metric):
+    import plotly.express as px
+    # One line per category across start years
+    matrix = backend.cohort_matrix()
+    fig = px.line(matrix, x='Started', y=metric, color='Category', markers=True,
+                  title=f'{metric} per Category across Start Years',
+                  labels={'Started': 'Start Year'},
+                  color_discrete_sequence=px.colors.qualitative.Light24)
+    return fig
+
+
+# Views per Video Analysis
+def views_per_video_top_channels(backend, top_n, categories):
+    # Apply top N filter based on subscribers within the selected categories
+    return backend.top_channels('Subscribers', top_n, categories=categories)
+
+
+def channel_views_per_video_figure(backend, top_n, categories):
+    import plotly.express as px
+    # Sort by Views per Video
+    top = fold_bars(views_per_video_top_channels(backend, top_n, categories), 'Youtuber', 'Views per Video')
+    sorted_data = top.sort_values(by='Views per Video', ascending=False)
+    fig = px.bar(sorted_data, x='Youtuber', y='Views per Video', color='Category',
+                 title='Views per Video for Each YouTuber',
+                 labels={'Views per Video': 'Views per Video', 'Youtuber': 'YouTuber'})
+    fig.update_layout(showlegend=True)
+    return fig
+
+
+def category_views_per_video_figure(backend, top_n, categories):
+    import plotly.express as px
+    # Calculate mean views per video per category, then sort; the backend aggregates the global top N,
+    # a category selection ranks within those categories so it groups the (at most N) selected rows
+    if categories is None:
+        category_views_per_video = backend.category_aggregate('Views per Video', 'mean', top_n)
+    else:
+        top = views_per_video_top_channels(backend, top_n, categories)
+        with stage('groupby'):
+            category_views_per_video = top.groupby('Category', observed=True)['Views per Video'].mean().reset_index()
+    category_views_per_video = category_views_per_video.sort_values(by='Views per Video', ascending=False)
+    fig = px.bar(category_views_per_video, x='Category', y='Views per Video', color='Category',
+                 title='Views per Video for Each Category',
+                 labels={'Views per Video': 'Views per Video', 'Category': 'Category'})
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+# Comparative Analysis
+def comparative_top_channels(backend, metric, top_n, category):
+    # Top N YouTubers by a metric, restricted to the selected category
+    return backend.top_channels(metric, top_n, categories=None if category is None else [category])
+
+
+def comparative_figure(backend, metric, top_n, category, title, axis_title):
+    import plotly.express as px
+    # Sort ascending so the largest bar ends up on top of the horizontal chart
+    top = fold_bars(comparative_top_channels(backend, metric, top_n, category), 'Youtuber', metric).sort_values(by=metric, ascending=True)
+    fig = px.bar(top, y='Youtuber', x=metric, title=title)
+    fig.update_traces(marker=dict(color=highlight_last(len(top))))
+    fig.update_layout(xaxis=dict(title=axis_title), yaxis=dict(title='YouTuber'))
+    return fig
+
+
+def comparative_subscribers_figure(backend, top_n, category):
+    return comparative_figure(backend, 'Subscribers', top_n, category, 'Top Youtubers by Subscribers', 'Subscribers')
+
+
+def comparative_views_figure(backend, top_n, category):
+    return comparative_figure(backend, 'Video Views', top_n, category, 'Top Youtubers by Video Views', 'Video Views')
+
+
+def comparative_videos_figure(backend, top_n, category):
+    return comparative_figure(backend, 'Video Count', top_n, category, 'Top Youtubers by Number of Videos', 'Number of Videos')
+
+
+# Distributions: built from merged quantile sketches (utils.sketches), so their size depends on the
+# number of groups, never on the number of channels
+def short_number(value):
+    # 1500000 -> '1.5M', for log-axis tick labels
+    for threshold, suffix in ((1e12, 'T'), (1e9, 'B'), (1e6, 'M'), (1e3, 'K')):
+        if value >= threshold:
+            return f'{value / threshold:g}{suffix}'
+    return f'{value:g}'
+
+
+def distribution_box_figure(quantiles, metric, by='Category'):
+    # Box per group from the sketch quantiles, whiskers at the 5th and 95th percentiles, on a log axis
+    fig = go.Figure(go.Box(x=quantiles[by], q1=quantiles['P25'], median=quantiles['P50'], q3=quantiles['P75'],
+                           lowerfence=quantiles['P5'], upperfence=quantiles['P95'], marker_color='#33a8ff',
+                           name=metric))
+    fig.update_layout(title=f'{metric} Distribution by {by} (5th-95th percentile whiskers)',
+                      xaxis=dict(title=by), yaxis=dict(title=metric, type='log'), showlegend=False)
+    return fig
+
+
+def distribution_violin_figure(sketches, metric, by='Category'):
+    # Violin per group over VIOLIN_QUANTILES of its sketch; drawn on log10 values so the density is
+    # estimated on the same scale it is shown, zeros left out
+    fig = go.Figure()
+    low, high = np.inf, -np.inf
+    for label, sketch in sketches.items():
+        values = sketch.quantile(VIOLIN_QUANTILES)
+        values = np.log10(values[values > 0])
+        if not len(values):
+            continue
+        low, high = min(low, values.min()), max(high, values.max())
+        fig.add_trace(go.Violin(x=[label] * len(values), y=values, name=str(label), box_visible=True,
+                                meanline_visible=False, points=False, hoverinfo='name'))
+    powers = np.arange(np.floor(low), np.ceil(high) + 1) if np.isfinite(low) else np.array([])
+    fig.update_layout(title=f'{metric} Distribution by {by}', xaxis=dict(title=by), showlegend=False,
+                      yaxis=dict(title=metric, tickvals=powers, ticktext=[short_number(10 ** power) for power in powers]))
+    return fig
+
+
+def distribution_cdf_figure(sketches, metric, by='Category'):
+    import plotly.express as px
+    # Cumulative share of channels at or below each value, one step line per group
+    curves = []
+    for label, sketch in sketches.items():
+        values, shares = sketch.cdf()
+        curves.append(pd.DataFrame({by: str(label), metric: values, 'Channels (%)': shares}))
+    curves = pd.concat(curves, ignore_index=True) if curves else pd.DataFrame(columns=[by, metric, 'Channels (%)'])
+    fig = px.line(curves[curves[metric] > 0], x=metric, y='Channels (%)', color=by, line_shape='hv', log_x=True,
+                  title=f'Cumulative Distribution of {metric} by {by}',
+                  color_discrete_sequence=px.colors.qualitative.Light24)
+    fig.update_yaxes(range=[0, 100])
+    return fig
+
+
+# Chart builders by (page, chart)
+CHARTS = {
+    ('categorical', 'category_count'): category_count_figure,
+    ('categorical', 'category_subscribers'): category_subscribers_figure,
+    ('categorical', 'category_views'): category_views_figure,
+    ('categorical', 'category_video_counts'): category_video_counts_figure,
+    ('categorical', 'bubble'): category_bubble_figure,
+    ('yearly', 'subscribers'): yearly_subscribers_figure,
+    ('cohorts', 'heatmap'): cohort_heatmap_figure,
+    ('cohorts', 'trends'): cohort_trends_figure,
+    ('views_per_video', 'channels'): channel_views_per_video_figure,
+    ('views_per_video', 'categories'): category_views_per_video_figure,
+    ('comparative', 'subscribers'): comparative_subscribers_figure,
+    ('comparative', 'views'): comparative_views_figure,
+    ('comparative', 'videos'): comparative_videos_figure,
+}
+
+
+def filter_combinations(backend):
+    """Yield (page, chart, filters) for every sidebar selection a page offers.
+
+    Multi-select category filters cover 'Select All' and each single category;
+    arbitrary category subsets are left to the on-demand figure cache. Cohort
+    charts cover every start year at once and only take the metric.
+    """
+    labels = backend.category_counts()['Category'].tolist()
+    years = backend.years()
+
+    for page, chart in CHARTS:
+        if page == 'cohorts':
+            for metric in COHORT_METRICS:
+                yield page, chart, dict(metric=metric)
+            continue
+        for top_n in TOP_N_OPTIONS[page]:
+            if page in ('categorical', 'views_per_video'):
+                choices = [dict(top_n=top_n, categories=None)] + [dict(top_n=top_n, categories=(label,)) for label in labels]
+            elif page == 'yearly':
+                choices = [dict(top_n=top_n, year=year) for year in years]
+            else:
+                choices = [dict(top_n=top_n, category=label) for label in [None] + labels]
+            for filters in choices:
+                yield page, chart, filters
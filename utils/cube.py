@@ -0,0 +1,112 @@
+import numpy as np
+import streamlit as st
+
+from utils.data import dataset_version
+from utils.profiling import stage
+from utils.ranking import RANK_METRICS, rank_index
+
+# Metrics aggregated in the cube: every metric the pages rank by
+CUBE_METRICS = RANK_METRICS
+
+# Top-N sizes offered by the pages; a channel's bucket is the smallest top-N it belongs to
+TOP_N_BUCKETS = [5, 10, 25, 100, 500, 1000]
+
+# Statistics stored per cell and metric
+STATS = ['count', 'sum', 'min', 'max']
+
+# Count metrics totalled per (Started, Category) cohort, and every column of the cohort matrix
+COHORT_TOTALS = ['Subscribers', 'Video Views', 'Video Count']
+COHORT_METRICS = ['Channels'] + COHORT_TOTALS + ['Year Share (%)', 'Top Channel Share (%)']
+
+
+class AggregateCube:
+    """Per-metric count, sum, min and max over (Category, Started, top-N bucket) cells.
+
+    Buckets rank channels by Subscribers over the whole table, so "top N,
+    then filter by category/year" is answered by rolling up cells instead of
+    scanning rows. Means are derived from the rolled-up sums and counts.
+    """
+
+    def __init__(self, data, subscriber_rank):
+        frame = data[['Category', 'Started'] + CUBE_METRICS].copy()
+        frame['Bucket'] = np.searchsorted(TOP_N_BUCKETS, subscriber_rank, side='right')
+        aggregations = {'Channels': ('Category', 'size')}
+        for metric in CUBE_METRICS:
+            for stat in STATS:
+                aggregations[f'{metric} {stat}'] = (metric, stat)
+        self.cells = frame.groupby(['Category', 'Started', 'Bucket'], observed=True).agg(**aggregations).reset_index()
+
+    def query(self, by='Category', top_n=None, categories=None, years=None):
+        """Roll up the cells matching the filters, one row per value of 'by' (a column or list of columns).
+
+        Returns a frame with 'by', 'Channels' and '<metric> <stat>' columns
+        for count, sum, mean, min and max of every metric.
+        """
+        with stage('groupby'):
+            return self._query(by, top_n, categories, years)
+
+    def _query(self, by, top_n, categories, years):
+        cells = self.cells
+        if top_n is not None:
+            if top_n not in TOP_N_BUCKETS:
+                raise ValueError(f"top_n must be one of {TOP_N_BUCKETS}, got {top_n}")
+            cells = cells[cells['Bucket'] <= TOP_N_BUCKETS.index(top_n)]
+        if categories is not None:
+            cells = cells[cells['Category'].isin(categories)]
+        if years is not None:
+            cells = cells[cells['Started'].isin(years)]
+
+        rollup = {'Channels': 'sum'}
+        for metric in CUBE_METRICS:
+            rollup.update({f'{metric} count': 'sum', f'{metric} sum': 'sum', f'{metric} min': 'min', f'{metric} max': 'max'})
+        result = cells.groupby(by, observed=True).agg(rollup)
+        for metric in CUBE_METRICS:
+            result[f'{metric} mean'] = result[f'{metric} sum'] / result[f'{metric} count']
+        return result.reset_index()
+
+    def aggregate(self, metric, stat, by='Category', **filters):
+        """Two-column frame of one statistic per group, like groupby(by)[metric].<stat>().reset_index()."""
+        result = self.query(by, **filters)
+        return result[[by, f'{metric} {stat}']].rename(columns={f'{metric} {stat}': metric})
+
+    def counts(self, by='Category', **filters):
+        """Number of channels per group, largest first, like value_counts().reset_index()."""
+        result = self.query(by, **filters)[[by, 'Channels']].rename(columns={'Channels': 'Count'})
+        return result.sort_values(by='Count', ascending=False, kind='stable').reset_index(drop=True)
+
+    def cohort_cells(self):
+        """Channels, metric totals and largest Subscribers per (Started, Category), from every bucket."""
+        result = self.query(['Started', 'Category'])
+        cells = result[['Started', 'Category', 'Channels']].assign(Category=result['Category'].astype(str))
+        for metric in COHORT_TOTALS:
+            cells[metric] = result[f'{metric} sum']
+        cells['Top Subscribers'] = result['Subscribers max']
+        return cells
+
+
+def cohort_shares(cells):
+    """Complete a cohort_cells frame into the cohort matrix, sorted by year and category.
+
+    'Year Share (%)' is the cohort's part of its start year's subscribers and
+    'Top Channel Share (%)' the part of the cohort's subscribers held by its
+    largest channel; both are NaN for cohorts without subscribers.
+    """
+    with stage('cohort matrix'):
+        matrix = cells.sort_values(['Started', 'Category'], kind='stable', ignore_index=True)
+        subscribers = matrix['Subscribers'].astype('float64')
+        year_totals = subscribers.groupby(matrix['Started']).transform('sum')
+        matrix['Year Share (%)'] = subscribers / year_totals.where(year_totals > 0) * 100
+        matrix['Top Channel Share (%)'] = matrix['Top Subscribers'].astype('float64') / subscribers.where(subscribers > 0) * 100
+        return matrix.drop(columns='Top Subscribers')
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _aggregate_cube(version, _data):
+    ranks = rank_index(_data)
+    with stage('aggregate cube build'):
+        return AggregateCube(_data, ranks.ranks['Subscribers'])
+
+
+def aggregate_cube(data):
+    """Return the aggregate cube of a loaded dataset, built once per dataset version."""
+    return _aggregate_cube(dataset_version(data), data)
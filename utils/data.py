@@ -0,0 +1,115 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from utils import schema, snapshot
+from utils.metrics import add_metrics
+from utils.profiling import stage
+
+# Location of the bundled dataset, resolved from the repository root so pages work from any CWD
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_PATH = ROOT_DIR / 'data' / 'Top Youtubers Dataset.csv'
+
+
+def file_stamp(path=DATA_PATH):
+    """Cheap identity of the file on disk, used as the cache key on every rerun."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_hash(path=DATA_PATH):
+    """Content hash of the file, computed once per file stamp."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_csv(path=DATA_PATH):
+    # Attempt to read the CSV file with a specified encoding
+    with stage('csv load'):
+        try:
+            return pd.read_csv(path, encoding='utf-8')
+        except UnicodeDecodeError:
+            return pd.read_csv(path, encoding='latin1')
+
+
+def coerce(data):
+    """Apply the channel table schema, raising schema.SchemaError for bad rows."""
+    with stage('dtype coercion'):
+        return schema.enforce(data)
+
+
+def prepare(data):
+    """Coerce column types and add the derived columns shared by the pages."""
+    return add_metrics(coerce(data))
+
+
+def build_snapshot(path=DATA_PATH):
+    """Convert the CSV into its typed Arrow snapshot and return the snapshot path."""
+    path = str(path)
+    stamp = file_stamp(path)
+    return snapshot.write_snapshot(coerce(read_csv(path)), snapshot.snapshot_path(path), stamp, file_hash(path))
+
+
+def read_dataset(path=DATA_PATH, use_snapshot=True):
+    """Load and prepare the dataset without any caching.
+
+    With use_snapshot, a fresh Arrow snapshot is memory-mapped instead of
+    parsing the CSV; a missing or stale one is rebuilt from the CSV when the
+    data directory is writable.
+    """
+    path = str(path)
+    if use_snapshot and snapshot.available():
+        snap_path = snapshot.snapshot_path(path)
+        stamp = file_stamp(path)
+        if snapshot.is_fresh(snap_path, stamp, lambda: file_hash(path)):
+            with stage('snapshot load'):
+                data, source = snapshot.read_snapshot(snap_path)
+            data = add_metrics(data)
+            data.attrs['version'] = source['hash'][:12]
+            data.attrs['source'] = 'snapshot'
+            return data
+
+        data = coerce(read_csv(path))
+        digest = file_hash(path)
+        try:
+            snapshot.write_snapshot(data, snap_path, stamp, digest)
+        except OSError:
+            pass  # read-only deployments keep serving from the CSV
+    else:
+        data = coerce(read_csv(path))
+        digest = file_hash(path)
+
+    data = add_metrics(data)
+    data.attrs['version'] = digest[:12]
+    data.attrs['source'] = 'csv'
+    return data
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _load_data(path, stamp, use_snapshot):
+    # 'stamp' is only part of the cache key: a new mtime/size loads a new version
+    return read_dataset(path, use_snapshot)
+
+
+def load_data(path=DATA_PATH):
+    """Return the prepared dataset, shared across reruns and sessions.
+
+    The frame is a single process-wide object, so callers must treat it as
+    read-only and derive new frames (filters, nlargest, ...) instead of
+    assigning columns in place. Set TUBEMETRICS_SNAPSHOT=0 to always parse
+    the CSV.
+    """
+    path = str(path)
+    use_snapshot = os.environ.get('TUBEMETRICS_SNAPSHOT', '1') != '0'
+    return _load_data(path, file_stamp(path), use_snapshot)
+
+
+def dataset_version(data):
+    """Version tag of a frame returned by load_data, for keying derived caches."""
+    return data.attrs.get('version', '')
@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+import streamlit as st
+
+from utils.charts import CHARTS, render_key
+from utils.data import DATA_PATH
+from utils.profiling import register_stats, stage
+from utils.snapshot import atomic_path
+
+# Default memory cap of the figure cache, overridable with TUBEMETRICS_FIGURE_CACHE_MB
+DEFAULT_CACHE_MB = 64
+
+# Figures prebuilt by scripts/precompute.py, loaded into the cache on first use of a dataset version
+ARTIFACT_PATH = os.path.splitext(str(DATA_PATH))[0] + '.figures.json'
+
+
+class FigureCache:
+    """Bounded, thread-safe LRU of serialized Plotly figures.
+
+    Entries are JSON strings, so the memory cap is the total length of the
+    stored specs; the least recently used entries are evicted past it.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            spec = self.entries.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return spec
+
+    def put(self, key, spec):
+        size = len(spec)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= len(self.entries.pop(key))
+            self.entries[key] = spec
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def figure_cache():
+    """The process-wide figure cache shared by every session."""
+    max_mb = float(os.environ.get('TUBEMETRICS_FIGURE_CACHE_MB', DEFAULT_CACHE_MB))
+    return FigureCache(int(max_mb * 1024 * 1024))
+
+
+# Hits, misses and size of the cache, shown with each profiled rerun
+register_stats('Figure cache', lambda: figure_cache().stats())
+
+
+def _plain(value):
+    # Lists become tuples and numpy scalars Python ones, so equal selections share a key
+    if isinstance(value, (list, tuple)):
+        return tuple(_plain(item) for item in value)
+    return value.item() if hasattr(value, 'item') else value
+
+
+def filter_key(filters):
+    """Hashable, order-independent form of a chart's filter values."""
+    return tuple(sorted((name, _plain(value)) for name, value in filters.items()))
+
+
+def cached_figure(page, chart, version, filters, build):
+    """Return the figure for (page, chart, dataset version, filters), building it only on a miss.
+
+    'build' is called without arguments and does all the pandas and Plotly
+    work for the chart; on a hit the stored spec is deserialized instead.
+    """
+    cache = figure_cache()
+    key = (page, chart, version, filters)
+    spec = cache.get(key)
+    if spec is not None:
+        with stage(f'figure cache hit: {chart}'):
+            return pio.from_json(spec)
+    with stage(f'figure build: {chart}'):
+        fig = build()
+    with stage(f'figure serialization: {chart}'):
+        cache.put(key, fig.to_json())
+    return fig
+
+
+def save_artifact(path, version, entries):
+    """Write prebuilt figures, as (page, chart, filter key, spec) tuples, for one dataset version."""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'entries': entries}, f)
+
+
+def load_artifact(cache, version, path=ARTIFACT_PATH):
+    """Seed 'cache' with the prebuilt figures of 'version'; returns the number loaded.
+
+    Artifacts built from another dataset version are ignored.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            artifact = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if artifact.get('version') != version:
+        return 0
+    for page, chart, filters, spec in artifact['entries']:
+        cache.put((page, chart, version, filter_key(dict(filters))), spec)
+    return len(artifact['entries'])
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _preloaded(version):
+    return load_artifact(figure_cache(), version)
+
+
+def figure_version(backend):
+    """Version figures are cached and prebuilt under: the dataset version plus the rendering settings."""
+    return f'{backend.version}/{render_key()}'
+
+
+def chart_figure(page, chart, backend, **filters):
+    """Figure of a chart registered in utils.charts.CHARTS, served from the figure cache."""
+    build = CHARTS[page, chart]
+    version = figure_version(backend)
+    _preloaded(version)
+    return cached_figure(page, chart, version, filter_key(filters), lambda: build(backend, **filters))
+
+
+def show_figure(fig):
+    """Render a figure full-width, timing Streamlit's serialization of it."""
+    with stage('chart serialization'):
+        st.plotly_chart(fig, use_container_width=True)
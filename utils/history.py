@@ -0,0 +1,157 @@
+import datetime
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from utils import snapshot
+from utils.data import ROOT_DIR, coerce, file_hash, file_stamp, read_csv
+from utils.metrics import add_metrics
+from utils.profiling import stage
+
+# Default location of the capture store, overridable with TUBEMETRICS_HISTORY
+HISTORY_DIR = ROOT_DIR / 'data' / 'history'
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = 'manifest.lock'
+
+# Seconds an append waits for another ingest to release the store
+LOCK_TIMEOUT = 30
+
+# Metrics summed per category when a capture is appended
+TOTAL_METRICS = ['Subscribers', 'Video Views', 'Video Count']
+
+
+def category_totals(data):
+    """Channels and summed metrics per category, as {category: {column: value}}."""
+    totals = data.groupby('Category', observed=True)[TOTAL_METRICS].sum()
+    totals.insert(0, 'Channels', data.groupby('Category', observed=True).size())
+    return {str(category): {column: int(value) for column, value in row.items()}
+            for category, row in totals.iterrows()}
+
+
+@contextmanager
+def _locked(path, timeout=LOCK_TIMEOUT):
+    # Creating the lock file is atomic on every platform, so only one process holds it at a time
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{path} is held by another ingest; delete it if none is running")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.remove(path)
+
+
+class SnapshotStore:
+    """Append-only store of ranking captures keyed by capture date.
+
+    Each capture is an immutable typed Arrow file '<YYYY-MM-DD>.arrow' that
+    already holds the derived columns. Its category totals are computed once
+    when it is appended and kept in the manifest, so adding a capture never
+    reads or rewrites earlier ones, and category growth needs no data at all.
+    Appends hold a lock file next to the manifest, so concurrent ingests
+    cannot drop each other's captures.
+    """
+
+    def __init__(self, directory=HISTORY_DIR):
+        self.directory = str(directory)
+        self.manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        self.lock_path = os.path.join(self.directory, LOCK_NAME)
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def dates(self):
+        """Capture dates, oldest first, as ISO strings."""
+        return sorted(self.manifest())
+
+    def append(self, data, date, stamp=(0, 0), digest=''):
+        """Store a typed channel table as the capture for 'date' and return its path.
+
+        Raises ValueError if that date is already captured: captures are never replaced.
+        """
+        date = datetime.date.fromisoformat(str(date)).isoformat()
+        data = add_metrics(data)
+        totals = category_totals(data)
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Read, check and rewrite the manifest under the lock so no other append slips in between
+        with _locked(self.lock_path):
+            manifest = self.manifest()
+            if date in manifest:
+                raise ValueError(f"a capture for {date} already exists")
+            path = snapshot.write_snapshot(data, os.path.join(self.directory, f'{date}.arrow'), stamp, digest)
+            manifest[date] = {'file': os.path.basename(path), 'hash': digest, 'rows': len(data),
+                              'categories': totals}
+            with snapshot.atomic_path(self.manifest_path) as tmp_path:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(manifest, f, indent=1, sort_keys=True)
+        return path
+
+    def append_csv(self, path, date=None):
+        """Validate a scraped CSV and append it, dated today unless 'date' is given."""
+        date = date or datetime.date.today().isoformat()
+        return self.append(coerce(read_csv(path)), date, file_stamp(path), file_hash(path))
+
+    def load(self, date):
+        """The capture for 'date' as a read-only frame, shared across sessions."""
+        entry = self.manifest()[date]
+        return _capture(os.path.join(self.directory, entry['file']), entry['hash'] or date)
+
+    def totals(self, date):
+        """Category totals of a capture as a frame, from the manifest."""
+        totals = pd.DataFrame.from_dict(self.manifest()[date]['categories'], orient='index')
+        return totals.rename_axis('Category').reset_index()
+
+    def category_growth(self, start, end, metric='Subscribers'):
+        """Per-category change in 'metric' (or 'Channels') from capture 'start' to 'end', largest first."""
+        before = self.totals(start).set_index('Category')[metric]
+        after = self.totals(end).set_index('Category')[metric]
+        growth = pd.DataFrame({'Before': before, 'After': after}).fillna(0)
+        growth['Change'] = growth['After'] - growth['Before']
+        growth['Change %'] = growth['Change'] / growth['Before'].where(growth['Before'] > 0) * 100
+        return growth.rename_axis('Category').reset_index().sort_values('Change', ascending=False, kind='stable')
+
+    def channel_growth(self, start, end, metric='Subscribers', n=None):
+        """Per-channel change in 'metric' and rank between two captures, largest gain first.
+
+        Channels are matched by name; those present in only one capture are left out.
+        """
+        columns = ['Youtuber', 'Category', 'Rank', metric]
+        before, after = self.load(start)[columns], self.load(end)[columns]
+        with stage('growth'):
+            merged = after.drop_duplicates('Youtuber').merge(
+                before.drop_duplicates('Youtuber')[['Youtuber', 'Rank', metric]],
+                on='Youtuber', suffixes=('', ' before'))
+            merged['Change'] = merged[metric].astype('float64') - merged[f'{metric} before'].astype('float64')
+            merged['Change %'] = merged['Change'] / merged[f'{metric} before'].where(merged[f'{metric} before'] > 0) * 100
+            # Positive when the channel climbed the ranking
+            merged['Rank Change'] = merged['Rank before'].astype('int64') - merged['Rank'].astype('int64')
+            merged = merged.sort_values('Change', ascending=False, kind='stable', ignore_index=True)
+        return merged if n is None else merged.head(n)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _capture(path, version):
+    # Captures are immutable, so the version only needs to tell different files apart
+    with stage('capture load'):
+        data, _ = snapshot.read_snapshot(path)
+    data.attrs['version'] = version[:12]
+    data.attrs['source'] = 'capture'
+    return data
+
+
+def history_store():
+    """The capture store at TUBEMETRICS_HISTORY (data/history by default)."""
+    return SnapshotStore(os.environ.get('TUBEMETRICS_HISTORY', HISTORY_DIR))
@@ -0,0 +1,35 @@
+import io
+import os
+from pathlib import Path
+
+import streamlit as st
+
+# Repository root, so image paths do not depend on the working directory
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Widest image Streamlit serves unchanged (twice its content width); it decodes, resizes and
+# re-encodes wider ones on every rerun, so they are sized down once here instead
+MAX_IMAGE_WIDTH = 1460
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _image(path, stamp):
+    # 'stamp' is only part of the cache key: an edited file is sized again
+    from PIL import Image  # only pages showing images need Pillow
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width <= MAX_IMAGE_WIDTH:
+            return data
+        height = round(image.height * MAX_IMAGE_WIDTH / image.width)
+        buffer = io.BytesIO()
+        image.resize((MAX_IMAGE_WIDTH, height), Image.LANCZOS).save(buffer, format=image.format, quality=90)
+        return buffer.getvalue()
+
+
+def image(path):
+    """Bytes of an image under the repository root, sized for display and cached until the file changes."""
+    path = str(ROOT_DIR / path)
+    stat = os.stat(path)
+    return _image(path, (stat.st_mtime_ns, stat.st_size))
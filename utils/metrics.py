@@ -0,0 +1,103 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.profiling import stage
+
+# Year channel ages are measured from; captures (utils.history) keep the age as of their ingest
+REFERENCE_YEAR = datetime.date.today().year
+
+# Derived columns every loaded table carries: the ones the pages, charts and backend queries read.
+# Other registered metrics are computed on demand, with add_metrics(data, [name])
+TABLE_METRICS = ['Views per Video']
+
+
+class DerivedMetric:
+    """A column computed from the base columns of the channel table.
+
+    'compute' takes the typed frame and returns one vectorized value per row.
+    'sql' is the same expression over the DuckDB 'channels' view, or None for
+    a metric only pandas can compute. 'policy' states what zero and missing
+    inputs produce.
+    """
+
+    def __init__(self, name, compute, sql, policy):
+        self.name = name
+        self.compute = compute
+        self.sql = sql
+        self.policy = policy
+
+
+# Registered metrics by column name, in the order they are added to the table
+METRICS = {}
+
+
+def register(name, sql=None, policy=''):
+    """Register a derived metric computed by the decorated function."""
+    def decorator(compute):
+        METRICS[name] = DerivedMetric(name, compute, sql, policy)
+        return compute
+    return decorator
+
+
+def ratio(numerator, denominator):
+    """numerator / denominator as float64, NaN wherever the denominator is 0 or missing.
+
+    NaN is skipped by means and sorts last, so channels without a denominator
+    (like the zero-video 'YouTube Movies') never top a ranking as inf.
+    """
+    numerator = numerator.to_numpy(dtype='float64', na_value=np.nan)
+    denominator = denominator.to_numpy(dtype='float64', na_value=np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = numerator / denominator
+    result[~(denominator > 0)] = np.nan
+    return result
+
+
+def sql_ratio(numerator, denominator):
+    return f'CASE WHEN "{denominator}" > 0 THEN "{numerator}"::DOUBLE / "{denominator}" END'
+
+
+@register('Views per Video', sql_ratio('Video Views', 'Video Count'), 'NaN when Video Count is 0')
+def views_per_video(data):
+    return ratio(data['Video Views'], data['Video Count'])
+
+
+@register('Subscribers per Video', sql_ratio('Subscribers', 'Video Count'), 'NaN when Video Count is 0')
+def subscribers_per_video(data):
+    return ratio(data['Subscribers'], data['Video Count'])
+
+
+@register('Views per Subscriber', sql_ratio('Video Views', 'Subscribers'), 'NaN when Subscribers is 0')
+def views_per_subscriber(data):
+    return ratio(data['Video Views'], data['Subscribers'])
+
+
+@register('Channel Age', f'GREATEST({REFERENCE_YEAR} - Started, 0)', f'years from Started to {REFERENCE_YEAR}, 0 for later years')
+def channel_age(data):
+    return np.maximum(REFERENCE_YEAR - data['Started'].to_numpy(dtype='int64'), 0).astype('int16')
+
+
+def add_metrics(data, names=TABLE_METRICS):
+    """Add the registered metrics 'names' (by default TABLE_METRICS) as columns, in place, and return the frame.
+
+    Metrics already present are kept, so frames stored with their derived
+    columns (captures) are never recomputed.
+    """
+    with stage('derived columns'):
+        for name in names:
+            if name not in data:
+                data[name] = pd.Series(METRICS[name].compute(data), index=data.index)
+    return data
+
+
+def sql_columns(names=TABLE_METRICS):
+    """'expression AS "name"' for the metrics 'names' (by default TABLE_METRICS), comma separated.
+
+    Raises ValueError for a metric DuckDB cannot compute.
+    """
+    missing = [name for name in names if not METRICS[name].sql]
+    if missing:
+        raise ValueError(f"no SQL expression for {', '.join(missing)}")
+    return ', '.join(f'{METRICS[name].sql} AS "{name}"' for name in names)
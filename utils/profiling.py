@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import streamlit as st
+
+logger = logging.getLogger('tubemetrics.profiling')
+
+# Per-thread record of the current rerun; Streamlit runs each session's script in its own thread
+_local = threading.local()
+
+# Profiled reruns in progress across all sessions; tracemalloc, which slows allocation-heavy code,
+# only runs while there is one (unless something else started it)
+_tracing = {'runs': 0, 'owned': False}
+_tracing_lock = threading.Lock()
+
+# Counters of shared caches added to every profiled rerun, by label (see register_stats)
+_stats = {}
+
+
+def _requested():
+    # Opt in with TUBEMETRICS_PROFILE=1 for every session, or ?profile=1 in the page URL
+    if os.environ.get('TUBEMETRICS_PROFILE', '0') != '0':
+        return True
+    try:
+        return st.query_params.get('profile', '0') != '0'
+    except Exception:  # outside a Streamlit session
+        return False
+
+
+def _start_tracing():
+    with _tracing_lock:
+        _tracing['runs'] += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing['owned'] = True
+
+
+def _stop_tracing():
+    with _tracing_lock:
+        _tracing['runs'] -= 1
+        if not _tracing['runs'] and _tracing['owned']:
+            tracemalloc.stop()
+            _tracing['owned'] = False
+
+
+def register_stats(label, stats):
+    """Report 'stats()', a dict of counters such as hits and misses, in every profiled rerun."""
+    _stats[label] = stats
+
+
+@contextmanager
+def run(page):
+    """Record the stages of the page rerun inside it, if profiling is requested.
+
+    When the body completes, the stages are shown in a sidebar panel and
+    exported (see finish()). Streamlit ends a rerun cut short by the next
+    interaction, or one that raises, with an exception in its script
+    thread; tracing is released either way.
+    """
+    begin(page)
+    try:
+        yield
+        finish()
+    finally:
+        _release()
+
+
+def begin(page):
+    """Start recording the stages of a page rerun, if profiling is requested; pages use run()."""
+    _release()
+    if not _requested():
+        return
+    # Memory deltas come from tracemalloc, traced from here until the rerun ends
+    _start_tracing()
+    _local.run = {'page': page, 'start': time.perf_counter(), 'stages': [], 'depth': 0}
+
+
+def _release():
+    # Drop this thread's run, if any, and its hold on tracemalloc
+    run = getattr(_local, 'run', None)
+    _local.run = None
+    if run is not None:
+        _stop_tracing()
+
+
+def active():
+    return getattr(_local, 'run', None) is not None
+
+
+@contextmanager
+def stage(name):
+    """Time a hot-path stage and its traced memory delta; a no-op unless begin() enabled profiling."""
+    run = getattr(_local, 'run', None)
+    if run is None:
+        yield
+        return
+    record = {'stage': name, 'depth': run['depth']}
+    run['stages'].append(record)
+    run['depth'] += 1
+    memory = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['ms'] = (time.perf_counter() - start) * 1000
+        record['memory_kb'] = (tracemalloc.get_traced_memory()[0] - memory) / 1024
+        run['depth'] -= 1
+
+
+def finish():
+    """Stop recording, show the stages in a sidebar panel and export them as a JSON line.
+
+    Records are logged at INFO level to the 'tubemetrics.profiling' logger
+    and, with TUBEMETRICS_PROFILE_LOG set, appended to that file. They also
+    hold the counters of every cache given to register_stats.
+    """
+    run = getattr(_local, 'run', None)
+    _release()
+    if run is None:
+        return None
+
+    record = {
+        'time': time.time(),
+        'page': run['page'],
+        'total_ms': (time.perf_counter() - run['start']) * 1000,
+        'stages': run['stages'],
+        'caches': {label: stats() for label, stats in _stats.items()},
+    }
+    line = json.dumps(record)
+    logger.info(line)
+    log_path = os.environ.get('TUBEMETRICS_PROFILE_LOG')
+    if log_path:
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+    with st.sidebar.expander("Performance", expanded=False):
+        st.caption(f"Rerun took {record['total_ms']:.1f} ms")
+        st.dataframe(
+            [{'Stage': ' ' * item['depth'] + item['stage'],
+              'Wall time (ms)': round(item['ms'], 2),
+              'Memory delta (KB)': round(item['memory_kb'], 1)} for item in record['stages']],
+            hide_index=True,
+        )
+        st.caption("Memory deltas come from the process-wide tracemalloc counter, so sessions "
+                   "rerunning at the same time add to each other's.")
+        for label, counters in record['caches'].items():
+            st.caption(f"{label}: " + ', '.join(f'{name} {value:,}' for name, value in counters.items()))
+    return record
@@ -0,0 +1,116 @@
+import numpy as np
+import streamlit as st
+
+from utils.data import dataset_version
+from utils.profiling import stage
+
+# Metrics the pages rank channels by
+RANK_METRICS = ['Subscribers', 'Video Views', 'Video Count', 'Views per Video']
+
+# Columns whose values get their own pre-sorted slices
+GROUP_COLUMNS = ['Category', 'Started']
+
+
+def descending_order(values):
+    """Row positions sorted by value, largest first, ties in row order (as nlargest keep='first').
+
+    Missing values (NaN) come last.
+    """
+    if values.dtype.kind == 'f':
+        values = np.where(np.isnan(values), -np.inf, values)
+    n = len(values)
+    return (n - 1 - np.argsort(values[::-1], kind='stable'))[::-1]
+
+
+class RankIndex:
+    """Pre-sorted row permutations of a dataset, one per metric and per group value.
+
+    A top-N query is then a slice of a permutation (one group or the whole
+    table) or a merge of the first N rows of several group slices, instead of
+    a full nlargest selection over the frame. The inverse permutations give
+    any row's rank, overall or within its group, without sorting.
+    """
+
+    def __init__(self, data, metrics=RANK_METRICS, groups=GROUP_COLUMNS):
+        self.data = data
+        self.orders = {}
+        self.ranks = {}
+        self.group_orders = {}
+        self.group_ranks = {}
+        self.counts = {}
+        self.group_counts = {}
+        for metric in metrics:
+            values = data[metric].to_numpy()
+            valid = ~np.isnan(values) if values.dtype.kind == 'f' else np.ones(len(values), dtype=bool)
+            order = descending_order(values)
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            self.orders[metric] = order
+            self.ranks[metric] = rank
+            self.counts[metric] = int(valid.sum())
+            for column in groups:
+                slices = self._split(data[column], order)
+                group_rank = np.empty_like(order)
+                for rows in slices.values():
+                    group_rank[rows] = np.arange(len(rows))
+                self.group_orders[column, metric] = slices
+                self.group_ranks[column, metric] = group_rank
+                self.group_counts[column, metric] = {key: int(valid[rows].sum()) for key, rows in slices.items()}
+
+    @staticmethod
+    def _split(column, order):
+        # Stable sort of the metric order by group keeps each group's rows in metric order
+        codes, keys = column.factorize(sort=True)
+        codes_in_order = codes[order]
+        by_group = order[np.argsort(codes_in_order, kind='stable')]
+        counts = np.bincount(codes_in_order[codes_in_order >= 0], minlength=len(keys))
+        slices = np.split(by_group[len(order) - counts.sum():], np.cumsum(counts)[:-1])
+        return {key.item() if hasattr(key, 'item') else key: rows for key, rows in zip(keys, slices)}
+
+    def top(self, metric, n, column=None, values=None):
+        """Row positions of the top 'n' rows by 'metric', largest first.
+
+        With 'column' and 'values', only rows whose 'column' is one of 'values'
+        are considered.
+        """
+        if column is None:
+            return self.orders[metric][:n]
+
+        slices = self.group_orders[column, metric]
+        heads = [slices[value][:n] for value in values if value in slices]
+        if not heads:
+            return self.orders[metric][:0]
+        if len(heads) == 1:
+            return heads[0]
+
+        # Merge the group heads by their global rank
+        candidates = np.concatenate(heads)
+        merged = candidates[np.argsort(self.ranks[metric][candidates], kind='stable')]
+        return merged[:n]
+
+    def position(self, metric, row, column=None):
+        """(0-based rank, number of ranked rows) of a row by 'metric', overall or within its 'column' group.
+
+        Rows missing the metric are not counted and rank after all others.
+        """
+        if column is None:
+            return self.ranks[metric][row], self.counts[metric]
+        key = self.data[column].iloc[row]
+        key = key.item() if hasattr(key, 'item') else key
+        return self.group_ranks[column, metric][row], self.group_counts[column, metric][key]
+
+    def top_frame(self, metric, n, column=None, values=None):
+        """Rows of the top 'n' channels by 'metric', like DataFrame.nlargest."""
+        with stage('top-n'):
+            return self.data.iloc[self.top(metric, n, column, values)]
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _rank_index(version, _data):
+    with stage('rank index build'):
+        return RankIndex(_data)
+
+
+def rank_index(data):
+    """Return the rank index of a loaded dataset, built once per dataset version."""
+    return _rank_index(dataset_version(data), data)
@@ -0,0 +1,86 @@
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = pd.StringDtype('pyarrow')
+except ImportError:  # pragma: no cover - fall back to pandas' own string storage
+    STRING_DTYPE = pd.StringDtype()
+
+# Column types of the channel table once loaded
+SCHEMA = {
+    'Rank': 'uint32',
+    'Youtuber': STRING_DTYPE,
+    'Subscribers': 'uint64',
+    'Video Views': 'uint64',
+    'Video Count': 'uint64',
+    'Category': 'category',
+    'Started': 'int16',
+}
+
+# Inclusive bounds a value must fall in for each integer column
+BOUNDS = {
+    'Rank': (1, 2**32 - 1),
+    'Subscribers': (0, 2**63),
+    'Video Views': (0, 2**63),
+    'Video Count': (0, 2**63),
+    'Started': (1900, 2100),
+}
+
+# Label used for channels without a category, as older pandas produced with astype(str)
+MISSING_CATEGORY = 'nan'
+
+
+class SchemaError(ValueError):
+    """Raised when rows of the channel table do not fit SCHEMA.
+
+    'problems' lists (row, column, value, reason) tuples, where row is the
+    0-based position of the row in the loaded file.
+    """
+
+    def __init__(self, problems):
+        self.problems = problems
+        shown = '; '.join(f"row {row}, {column}={value}: {reason}" for row, column, value, reason in problems[:10])
+        more = f" (and {len(problems) - 10} more)" if len(problems) > 10 else ''
+        super().__init__(f"{len(problems)} invalid value(s) in dataset: {shown}{more}")
+
+
+def _integer_problems(column, raw, values):
+    low, high = BOUNDS[column]
+    bad = values.isna() | (values < low) | (values > high) | (values % 1 != 0)
+    return [(row, column, raw.iloc[row], f"expected an integer in [{low}, {high}]") for row in bad.to_numpy().nonzero()[0]]
+
+
+def enforce(data):
+    """Return a copy of 'data' with SCHEMA applied, or raise SchemaError for bad rows."""
+    missing = [column for column in SCHEMA if column not in data.columns]
+    if missing:
+        raise SchemaError([(None, column, None, 'missing column') for column in missing])
+
+    problems = []
+    typed = {}
+    for column in BOUNDS:
+        values = pd.to_numeric(data[column], errors='coerce')
+        problems += _integer_problems(column, data[column], values)
+        typed[column] = values
+
+    names = data['Youtuber']
+    for row in names.isna().to_numpy().nonzero()[0]:
+        problems.append((row, 'Youtuber', None, 'missing channel name'))
+
+    if problems:
+        raise SchemaError(sorted(problems, key=lambda problem: problem[0]))
+
+    result = pd.DataFrame(index=data.index)
+    for column, dtype in SCHEMA.items():
+        if column in typed:
+            result[column] = typed[column].astype(dtype)
+        elif column == 'Category':
+            result[column] = data[column].fillna(MISSING_CATEGORY).astype(str).astype(dtype)
+        else:
+            result[column] = data[column].astype(dtype)
+
+    # Keep any extra columns after the schema ones
+    for column in data.columns:
+        if column not in SCHEMA:
+            result[column] = data[column]
+    return result
@@ -0,0 +1,129 @@
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data import dataset_version
+from utils.profiling import stage
+
+# Candidates kept per fuzzy query, and the trigram similarity (0-1) a name needs to count as a match
+FUZZY_CANDIDATES = 200
+MIN_SIMILARITY = 0.25
+
+
+def normalize(name):
+    """Case-folded name without accents, punctuation or repeated spaces."""
+    text = str(name).casefold()
+    if not text.isascii():
+        text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    return ' '.join(re.findall(r'\w+', text))
+
+
+def trigram_codes(keys):
+    """Distinct character trigrams of each padded key, as (sorted uint64 codes, row of each code).
+
+    Each trigram packs its three 21-bit code points into one integer, so the
+    whole table is processed with array operations instead of per-name sets.
+    """
+    padded = [f'  {key} ' for key in keys]
+    counts = np.fromiter(map(len, padded), dtype=np.int64, count=len(padded)) - 2
+    chars = np.frombuffer(''.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    rows = np.repeat(np.arange(len(padded), dtype=np.int64), counts)
+    # Start of every trigram: each key's offset in 'chars' plus 0 .. len - 3
+    ends = np.cumsum(counts)
+    starts = np.arange(ends[-1] if len(ends) else 0) + np.repeat(np.arange(len(padded)) * 2, counts)
+    codes = (chars[starts] << np.uint64(42)) | (chars[starts + 1] << np.uint64(21)) | chars[starts + 2]
+    # Sort codes with a stable sort of dense ids numbered in code order (a radix sort for small
+    # vocabularies); rows are generated in order, so each code's rows stay sorted
+    ids, _ = pd.factorize(codes, sort=True)
+    order = np.argsort(ids.astype(np.uint16) if ids.max(initial=0) < 2**16 else ids, kind='stable')
+    codes, rows = codes[order], rows[order]
+    distinct = np.ones(len(codes), dtype=bool)
+    distinct[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+    return codes[distinct], rows[distinct]
+
+
+def word_suffixes(keys):
+    """(suffix, row) for every word suffix of every key: 't series music' gives itself, 'series music' and 'music'."""
+    entries = [(key, row) for row, key in enumerate(keys)]
+    entries += [(key[match.end():], row) for row, key in enumerate(keys) for match in re.finditer(r' (?=\w)', key)]
+    return entries
+
+
+class ChannelIndex:
+    """Prefix and fuzzy lookup over channel names, built once per dataset.
+
+    Prefix queries match the start of any word of a name ('music' finds
+    'T-Series Music') by bisecting a sorted list of word suffixes. Fuzzy
+    queries score names by shared character trigrams through an inverted
+    index, so typos still match. Either way only the candidate rows are
+    touched, never the whole table; ties go to the more subscribed channel.
+    """
+
+    def __init__(self, names, popularity):
+        # popularity: each row's rank by subscribers (0 = most subscribed), used to order equal matches
+        self.popularity = popularity
+        keys = [normalize(name) for name in names]
+
+        # Every word suffix of every name, sorted, for prefix bisection
+        entries = sorted(word_suffixes(keys))
+        self.keys = [key for key, _ in entries]
+        self.rows = np.array([row for _, row in entries], dtype=np.int64)
+
+        # Inverted trigram index: the rows holding each trigram
+        codes, rows = trigram_codes(keys)
+        self.trigram_counts = np.bincount(rows, minlength=len(keys)).astype(np.int32)
+        bounds = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        self.postings = dict(zip(codes[np.r_[0, bounds]].tolist() if len(codes) else [], np.split(rows, bounds)))
+
+    def prefix(self, query):
+        """Rows with a word starting with 'query', most subscribed first."""
+        query = normalize(query)
+        if not query:
+            return self.rows[:0]
+        start = bisect.bisect_left(self.keys, query)
+        end = bisect.bisect_left(self.keys, query + '\U0010ffff', lo=start)
+        rows = np.unique(self.rows[start:end])
+        return rows[np.argsort(self.popularity[rows], kind='stable')]
+
+    def fuzzy(self, query, limit):
+        """Up to 'limit' rows whose names share the most trigrams with 'query' (Jaccard similarity)."""
+        query = normalize(query)
+        if not query:
+            # Only the padding would be left, whose all-space trigram every wordless name shares
+            return self.rows[:0]
+        query_codes, _ = trigram_codes([query])
+        grams = [self.postings[code] for code in query_codes.tolist() if code in self.postings]
+        if not grams:
+            return self.rows[:0]
+        rows, shared = np.unique(np.concatenate(grams), return_counts=True)
+        score = shared / (len(query_codes) + self.trigram_counts[rows] - shared)
+        rows, score = rows[score >= MIN_SIMILARITY], score[score >= MIN_SIMILARITY]
+        if len(rows) > FUZZY_CANDIDATES:
+            keep = np.argpartition(-score, FUZZY_CANDIDATES)[:FUZZY_CANDIDATES]
+            rows, score = rows[keep], score[keep]
+        best = np.lexsort((self.popularity[rows], -score))
+        return rows[best][:limit]
+
+    def search(self, query, limit=10):
+        """Row positions of the best matches: prefix matches first, then fuzzy ones."""
+        with stage('channel search'):
+            rows = list(self.prefix(query)[:limit])
+            if len(rows) < limit:
+                seen = set(rows)
+                rows += [row for row in self.fuzzy(query, limit) if row not in seen][:limit - len(rows)]
+            return np.array(rows, dtype=np.int64)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _channel_index(version, _data, _popularity):
+    with stage('search index build'):
+        return ChannelIndex(_data['Youtuber'].tolist(), _popularity)
+
+
+def channel_index(data, popularity):
+    """Return the search index of a loaded dataset, built once per dataset version."""
+    return _channel_index(dataset_version(data), data, popularity)
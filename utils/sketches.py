@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data import dataset_version
+from utils.profiling import stage
+
+# Metrics with a distribution sketch per (Category, Started) cell
+SKETCH_METRICS = ['Subscribers', 'Video Views', 'Views per Video']
+
+# Relative error of any quantile read from a sketch; positive values below MIN_VALUE share its bucket
+RELATIVE_ACCURACY = 0.01
+MIN_VALUE = 0.01
+
+# Bucket k holds positive values in (GAMMA**(k + MIN_KEY - 1), GAMMA**(k + MIN_KEY)]; zeros are counted apart
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = float(np.log(GAMMA))
+MIN_KEY = int(np.ceil(np.log(MIN_VALUE) / LOG_GAMMA))
+
+
+def bucket_index(values):
+    """Sketch bucket of each positive value, as int64."""
+    values = np.maximum(np.asarray(values, dtype='float64'), MIN_VALUE)
+    return np.ceil(np.log(values) / LOG_GAMMA).astype(np.int64) - MIN_KEY
+
+
+def sql_bucket_index(column):
+    """bucket_index as a DuckDB expression over a positive column."""
+    return f'CAST(CEIL(LN(GREATEST("{column}", {MIN_VALUE})) / {LOG_GAMMA!r}) AS BIGINT) - {MIN_KEY}'
+
+
+def bucket_value(index):
+    """Value standing for each bucket: within RELATIVE_ACCURACY of everything in it."""
+    return 2 * GAMMA ** (np.asarray(index, dtype='float64') + MIN_KEY) / (GAMMA + 1)
+
+
+class QuantileSketch:
+    """Counts of values per logarithmic bucket, DDSketch-style.
+
+    Every quantile read back is within RELATIVE_ACCURACY of the exact one,
+    whatever the number of values. Sketches merge exactly by adding their
+    counts, so the sketch of any union of cells costs as much as its
+    buckets (a few hundred), never its rows. Zeros (and negatives) are
+    counted apart and read back as 0.
+    """
+
+    def __init__(self, counts, offset=0, zeros=0):
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.offset = offset  # bucket index of counts[0]
+        self.zeros = int(zeros)
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        buckets = bucket_index(values[values > 0])
+        zeros = len(values) - len(buckets)
+        if not len(buckets):
+            return cls(np.zeros(0, dtype=np.int64), 0, zeros)
+        offset = int(buckets.min())
+        return cls(np.bincount(buckets - offset), offset, zeros)
+
+    @property
+    def count(self):
+        return self.zeros + int(self.counts.sum())
+
+    def merge(self, other):
+        """A new sketch of the values of both sketches."""
+        zeros = self.zeros + other.zeros
+        if not len(other.counts):
+            return QuantileSketch(self.counts, self.offset, zeros)
+        if not len(self.counts):
+            return QuantileSketch(other.counts, other.offset, zeros)
+        offset = min(self.offset, other.offset)
+        counts = np.zeros(max(self.offset + len(self.counts), other.offset + len(other.counts)) - offset, dtype=np.int64)
+        counts[self.offset - offset:self.offset - offset + len(self.counts)] += self.counts
+        counts[other.offset - offset:other.offset - offset + len(other.counts)] += other.counts
+        return QuantileSketch(counts, offset, zeros)
+
+    def quantile(self, q):
+        """Value at quantile(s) 'q' in [0, 1], like np.quantile(..., method='lower'); NaN when empty."""
+        q = np.asarray(q, dtype='float64')
+        total = self.count
+        if not total:
+            return np.full(q.shape, np.nan)[()]
+        ranks = np.floor(q * (total - 1)) - self.zeros
+        buckets = np.searchsorted(np.cumsum(self.counts), np.maximum(ranks, 0), side='right')
+        return np.where(ranks < 0, 0.0, bucket_value(buckets + self.offset))[()]
+
+    def cdf(self):
+        """(values, percent of values at or below each): 0 if any zeros, then every non-empty bucket."""
+        filled = np.flatnonzero(self.counts)
+        values = bucket_value(filled + self.offset)
+        shares = (self.zeros + np.cumsum(self.counts)[filled]) / max(self.count, 1) * 100
+        if self.zeros:
+            values, shares = np.r_[0.0, values], np.r_[self.zeros / self.count * 100, shares]
+        return values, shares
+
+
+class SketchCube:
+    """Quantile sketches of SKETCH_METRICS for every (Category, Started) cell.
+
+    Built in one pass when the dataset is loaded; a distribution query then
+    merges the sketches of the cells matching its category and year filters,
+    so it takes the same time for a thousand channels as for millions.
+    'counts[metric]' is a (category, year, bucket) array whose bucket axis
+    starts at 'offsets[metric]'; 'zeros[metric]' counts each cell's zeros.
+    """
+
+    def __init__(self, categories, years, counts, offsets, zeros):
+        self.categories = list(categories)
+        self.years = list(years)
+        self.counts = counts
+        self.offsets = offsets
+        self.zeros = zeros
+
+    @classmethod
+    def from_frame(cls, data):
+        category_codes, categories = pd.factorize(data['Category'].astype('string'), sort=True)
+        year_codes, years = pd.factorize(data['Started'], sort=True)
+        shape = (len(categories), len(years))
+        counts, offsets, zeros = {}, {}, {}
+        for metric in SKETCH_METRICS:
+            values = data[metric].to_numpy(dtype='float64', na_value=np.nan)
+            positive = values > 0
+            zeros[metric] = _cell_counts(category_codes[values <= 0], year_codes[values <= 0], None, shape)[0]
+            counts[metric], offsets[metric] = _cell_counts(
+                category_codes[positive], year_codes[positive], bucket_index(values[positive]), shape)
+        return cls(categories.tolist(), years.tolist(), counts, offsets, zeros)
+
+    @classmethod
+    def from_cells(cls, cells):
+        """Build from a frame of ('Metric', 'Category', 'Started', 'Bucket', 'Count') rows; a NULL Bucket counts zeros."""
+        category_codes, categories = pd.factorize(cells['Category'].astype('string'), sort=True)
+        year_codes, years = pd.factorize(cells['Started'], sort=True)
+        shape = (len(categories), len(years))
+        buckets = cells['Bucket'].to_numpy(dtype='float64', na_value=np.nan)
+        weights = cells['Count'].to_numpy(dtype=np.int64)
+        counts, offsets, zeros = {}, {}, {}
+        for metric in SKETCH_METRICS:
+            rows = (cells['Metric'] == metric).to_numpy()
+            zero, positive = rows & np.isnan(buckets), rows & ~np.isnan(buckets)
+            zeros[metric] = _cell_counts(category_codes[zero], year_codes[zero], None, shape, weights[zero])[0]
+            counts[metric], offsets[metric] = _cell_counts(
+                category_codes[positive], year_codes[positive], buckets[positive].astype(np.int64), shape, weights[positive])
+        return cls(categories.tolist(), years.tolist(), counts, offsets, zeros)
+
+    def _select(self, arrays, categories, years):
+        if categories is not None:
+            arrays = arrays[[i for i, category in enumerate(self.categories) if category in set(categories)]]
+        if years is not None:
+            arrays = arrays[:, [i for i, year in enumerate(self.years) if year in set(years)]]
+        return arrays
+
+    def sketch(self, metric, categories=None, years=None):
+        """The merged sketch of 'metric' over the cells matching the filters."""
+        return QuantileSketch(self._select(self.counts[metric], categories, years).sum(axis=(0, 1)), self.offsets[metric],
+                              self._select(self.zeros[metric], categories, years).sum())
+
+    def group_sketches(self, metric, by='Category', categories=None, years=None):
+        """{group: merged sketch} per 'Category' or 'Started' value with at least one channel."""
+        with stage('sketch merge'):
+            counts = self._select(self.counts[metric], categories, years)
+            zeros = self._select(self.zeros[metric], categories, years)
+            if by == 'Category':
+                labels = [category for category in self.categories if categories is None or category in set(categories)]
+                counts, zeros = counts.sum(axis=1), zeros.sum(axis=1)
+            else:
+                labels = [year for year in self.years if years is None or year in set(years)]
+                counts, zeros = counts.sum(axis=0), zeros.sum(axis=0)
+            return {label: QuantileSketch(row, self.offsets[metric], zero)
+                    for label, row, zero in zip(labels, counts, zeros) if zero or row.any()}
+
+    def quantiles(self, metric, quantiles, by='Category', categories=None, years=None):
+        """One row per group: 'by', 'Channels' and the value at each quantile (columns 'P<percent>')."""
+        rows = []
+        for label, sketch in self.group_sketches(metric, by, categories, years).items():
+            values = sketch.quantile(quantiles)
+            rows.append({by: label, 'Channels': sketch.count, **{f'P{q * 100:g}': value for q, value in zip(quantiles, values)}})
+        return pd.DataFrame(rows, columns=[by, 'Channels'] + [f'P{q * 100:g}' for q in quantiles])
+
+
+def _cell_counts(category_codes, year_codes, buckets, shape, weights=None):
+    # Dense (category, year, bucket) counts over the occupied bucket range, and that range's first bucket;
+    # without buckets, just (category, year) counts
+    if buckets is None:
+        cells = category_codes.astype(np.int64) * shape[1] + year_codes
+        return np.bincount(cells, weights, minlength=shape[0] * shape[1]).astype(np.int64).reshape(shape), 0
+    if not len(buckets):
+        return np.zeros(shape + (0,), dtype=np.int64), 0
+    offset = int(buckets.min())
+    span = int(buckets.max()) - offset + 1
+    cells = (category_codes.astype(np.int64) * shape[1] + year_codes) * span + (buckets - offset)
+    counts = np.bincount(cells, weights, minlength=shape[0] * shape[1] * span)
+    return counts.astype(np.int64).reshape(shape + (span,)), offset
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _sketch_cube(version, _data):
+    with stage('sketch build'):
+        return SketchCube.from_frame(_data)
+
+
+def sketch_cube(data):
+    """Return the distribution sketches of a loaded dataset, built once per dataset version."""
+    return _sketch_cube(dataset_version(data), data)
@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager, suppress
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - snapshots are optional, the CSV path still works
+    pa = None
+
+# Schema metadata key holding the identity of the CSV a snapshot was built from
+SOURCE_KEY = b'tubemetrics.source'
+
+# Layout of the stored table; bump whenever the stored column types change
+FORMAT_VERSION = 2
+
+
+def snapshot_path(csv_path, suffix='.arrow'):
+    """Snapshot stored next to the CSV it was converted from (Arrow IPC by default)."""
+    return os.path.splitext(str(csv_path))[0] + suffix
+
+
+def available():
+    return pa is not None
+
+
+def _read_metadata(path):
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).metadata or {}
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).schema.metadata or {}
+
+
+def read_source(path):
+    """Return the source metadata recorded in a snapshot, or None if unreadable."""
+    if pa is None or not os.path.exists(path):
+        return None
+    try:
+        metadata = _read_metadata(path)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if SOURCE_KEY not in metadata:
+        return None
+    source = json.loads(metadata[SOURCE_KEY])
+    if source.get('format') != FORMAT_VERSION:
+        return None
+    return source
+
+
+def is_fresh(path, stamp, hash_func):
+    """Check a snapshot against its CSV.
+
+    The recorded mtime/size is compared first; only when it differs is the
+    CSV content hashed, so a touched-but-unchanged file keeps its snapshot.
+    The snapshot then records the new mtime/size, so later starts skip the
+    hash again.
+    """
+    source = read_source(path)
+    if source is None:
+        return False
+    if tuple(source['stamp']) == tuple(stamp):
+        return True
+    if source['hash'] != hash_func():
+        return False
+    with suppress(OSError):  # a read-only data directory keeps hashing, as before
+        _restamp(path, stamp)
+    return True
+
+
+@contextmanager
+def atomic_path(path):
+    """Yield a new temporary path next to 'path', which replaces 'path' once the block completes.
+
+    Each writer gets its own file, so processes writing the same target
+    at once (replicas starting on a shared data directory) never write into
+    each other's output; the last complete file wins.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        os.chmod(tmp_path, 0o644)
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def _source_metadata(table, stamp, digest):
+    metadata = dict(table.schema.metadata or {})
+    metadata[SOURCE_KEY] = json.dumps({'stamp': list(stamp), 'hash': digest, 'format': FORMAT_VERSION})
+    return table.replace_schema_metadata(metadata)
+
+
+def _write_table(table, path):
+    with atomic_path(path) as tmp_path:
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            pq.write_table(table, tmp_path)
+        else:
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+
+def _restamp(path, stamp):
+    # Rewrite a snapshot with a new CSV mtime/size, keeping its data and hash
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    _write_table(_source_metadata(table, stamp, json.loads(table.schema.metadata[SOURCE_KEY])['hash']), path)
+
+
+def write_snapshot(data, path, stamp, digest):
+    """Write a typed frame atomically, as uncompressed Arrow IPC or, for a '.parquet' path, Parquet."""
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    _write_table(_source_metadata(table, stamp, digest), path)
+    return path
+
+
+def read_snapshot(path):
+    """Memory-map a snapshot and return it as a DataFrame plus its source metadata.
+
+    Numeric columns are handed to pandas without copying, so they stay backed
+    by the page cache and are shared between processes reading the same file.
+    """
+    source = pa.memory_map(path, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    data = table.to_pandas(split_blocks=True)
+    return data, json.loads(table.schema.metadata[SOURCE_KEY])
@@ -0,0 +1,19 @@
+import streamlit as st
+
+
+def lazy_tabs(labels, key):
+    """Create tabs that track the selected one, so hidden tabs can skip their work.
+
+    Switching tabs reruns the page; guard each tab's body with is_active(tab)
+    so only the selected tab builds its aggregations and figures.
+    """
+    try:
+        return st.tabs(labels, key=key, on_change='rerun')
+    except TypeError:
+        # Streamlit versions without tab state tracking: every tab renders
+        return st.tabs(labels)
+
+
+def is_active(tab):
+    """Whether a tab from lazy_tabs should render (always, if its state is not tracked)."""
+    return getattr(tab, 'open', None) is not False